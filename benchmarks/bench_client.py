@@ -0,0 +1,132 @@
+""" Client throughput and latency against a local stub node (or any node given with --url).
+
+    python -m benchmarks.bench_client --calls 2000 --workers 16 --latency 0.01 --jitter 0.01
+    python -m benchmarks.bench_client --transport ws --modes sequential,threads,async
+
+    Every mode fetches the same get_block calls: one after another, on a thread pool like call_many, as
+    call_batch batches and as concurrent coroutines on one AsyncClient.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scorum.api import AsyncClient, ConnectionPool, call_batch, get_transport
+from scorum.api.pool import default_pool
+from scorum.api.request import Request
+from scorum.api.transport import close_transports
+from scorum.api.stub import Fixtures, StubNode, UnixStubNode, WebSocketStubNode
+
+
+def percentile(latencies, p):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100.0))] if latencies else 0.0
+
+
+def timed(fn, *args):
+    ts = time.time()
+    r = fn(*args)
+    return r, time.time() - ts
+
+
+def sequential(url, calls, args):
+    request = Request()
+    latencies = []
+    for api, method, params in calls:
+        _, latency = timed(request.call, url, api, method, params)
+        latencies.append(latency)
+    return latencies
+
+
+def threads(url, calls, args):
+    # what call_many does, with every call timed on its own
+    latencies = []
+    pool = ConnectionPool(maxsize=args.workers) if get_transport(url) is default_pool else None
+
+    def call(c):
+        _, latency = timed(Request(pool).call, url, *c)
+        latencies.append(latency)
+
+    with ThreadPoolExecutor(args.workers) as executor:
+        list(executor.map(call, calls))
+    if pool is not None:
+        pool.close()
+    return latencies
+
+
+def batches(url, calls, args):
+    latencies = []
+    for i in range(0, len(calls), args.batch):
+        _, latency = timed(call_batch, url, calls[i:i + args.batch])
+        latencies.append(latency)
+    return latencies
+
+
+def coroutines(url, calls, args):
+    latencies = []
+
+    async def run():
+        semaphore = asyncio.Semaphore(args.workers)
+
+        async with AsyncClient() as client:
+            async def call(api, method, params):
+                async with semaphore:
+                    ts = time.time()
+                    await client.call(url, api, method, params, parse=True)
+                    latencies.append(time.time() - ts)
+
+            await asyncio.gather(*[call(*c) for c in calls])
+
+    asyncio.run(run())
+    return latencies
+
+
+MODES = {"sequential": sequential, "threads": threads, "call_batch": batches, "async": coroutines}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="node to benchmark, a local stub node is started when omitted")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=16, help="threads / coroutines in flight")
+    parser.add_argument("--batch", type=int, default=100, help="calls per call_batch batch")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--latency", type=float, default=0.0, help="stub node latency")
+    parser.add_argument("--jitter", type=float, default=0.0, help="stub node latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub node share of 503 responses")
+    parser.add_argument("--bandwidth", type=float, default=None, help="stub node bytes per second per response")
+    parser.add_argument("--transport", choices=("http", "unix", "ws"), default="http", help="stub node transport")
+    args = parser.parse_args()
+
+    node = None
+    url = args.url
+    if url is None:
+        fixtures = Fixtures(head_block=args.calls)
+        if args.transport == "ws":
+            node = WebSocketStubNode(fixtures, latency=args.latency, jitter=args.jitter)
+        elif args.transport == "unix":
+            node = UnixStubNode(os.path.join(tempfile.mkdtemp(), "node.sock"), fixtures, latency=args.latency,
+                                jitter=args.jitter, error_rate=args.error_rate, bandwidth=args.bandwidth)
+        else:
+            node = StubNode(fixtures, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                            bandwidth=args.bandwidth)
+        url = node.start().url
+
+    calls = [("blockchain_history_api", "get_block", [n]) for n in range(1, args.calls + 1)]
+
+    print("%-12s %10s %10s %10s %10s %10s" % ("mode", "calls/s", "p50", "p95", "p99", "max"))
+    for mode in args.modes.split(","):
+        latencies, elapsed = timed(MODES[mode], url, calls, args)
+        print("%-12s %10.1f %9.1fms %9.1fms %9.1fms %9.1fms" % (
+            mode, len(calls) / elapsed, 1000 * percentile(latencies, 50), 1000 * percentile(latencies, 95),
+            1000 * percentile(latencies, 99), 1000 * max(latencies)))
+
+    close_transports()
+    if node is not None:
+        node.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+""" Compare compressed and uncompressed get_blocks_history pages against a local bandwidth-capped stub node.
+
+    python -m benchmarks.bench_compression --bandwidth 2000000 --calls 20
+
+    The synthetic blocks are more repetitive than real ones, so real pages compress less.
+"""
+import argparse
+import time
+
+from scorum.api import Metrics
+from scorum.api.request import Request
+from scorum.api.stub import Fixtures, StubNode
+
+
+def run(url, calls, limit, compress):
+    metrics = Metrics()
+    request = Request(metrics=metrics, compress=compress)
+    ts = time.time()
+
+    for _ in range(calls):
+        assert len(request.call(url, "blockchain_history_api", "get_blocks_history", [limit + 1, limit])) == limit
+
+    elapsed = time.time() - ts
+    series = metrics.snapshot()[0]
+    return elapsed, series["response_bytes"], series["avg"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=1000, help="blocks per page")
+    parser.add_argument("--bandwidth", type=float, default=10e6, help="node upload bytes per second")
+    parser.add_argument("--level", type=int, default=6, help="gzip level used by the node")
+    args = parser.parse_args()
+
+    with StubNode(Fixtures(head_block=args.limit), bandwidth=args.bandwidth, compress_level=args.level) as node:
+        print("%-12s %10s %14s %12s %12s" % ("mode", "calls", "wire bytes", "avg latency", "pages/s"))
+        for compress in (False, True):
+            elapsed, wire, avg = run(node.url, args.calls, args.limit, compress)
+            print("%-12s %10d %14d %11.3fs %12.1f" % ("gzip" if compress else "identity", args.calls, wire, avg,
+                                                       args.calls / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+""" Replay a recorded TrafficLog through the client to compare client versions on identical traffic.
+
+    python -m benchmarks.bench_replay traffic.log --speed 10
+
+    Record the log with Request(pool=RecordingPool(path)) or AsyncClient(recorder=TrafficLog(path)). Batches are
+    replayed through call_batch, everything else through Request.call, in recorded order.
+"""
+import argparse
+import json
+import time
+
+from scorum.api import Metrics, ReplayPool, TrafficLog
+from scorum.api.request import Request
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="1 replays recorded latencies, 10 ten times faster, omitted answers at once")
+    args = parser.parse_args()
+
+    exchanges = list(TrafficLog(args.path))
+    metrics = Metrics()
+    request = Request(ReplayPool(args.path, args.speed), metrics=metrics)
+
+    ts = time.time()
+    cpu = time.process_time()
+
+    for exchange in exchanges:
+        payload = json.loads(exchange.body.decode("utf-8"))
+        if isinstance(payload, list):
+            request.call_batch(exchange.endpoint, [p["params"] for p in payload], chunk_size=len(payload))
+        else:
+            api, method, params = payload["params"]
+            request.call(exchange.endpoint, api, method, params)
+
+    elapsed = time.time() - ts
+    cpu = time.process_time() - cpu
+
+    print("%d exchanges in %.3fs (%.3fs CPU), %.1f calls/s" % (len(exchanges), elapsed, cpu,
+                                                              len(exchanges) / elapsed if elapsed else 0.0))
+    for s in metrics.snapshot():
+        print("%-24s %-40s %8d %10.4fs" % (s["api"], s["method"], s["count"], s["avg"]))
+
+
+if __name__ == "__main__":
+    main()
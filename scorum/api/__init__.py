@@ -1,5 +1,20 @@
 from .request import call
+from .request import call_batch
+from .request import call_many
 from .request import get_api_name
 from .request import get_curl_cli
+from .pool import ConnectionPool
+from .cache import ResponseCache
+from .nodes import NodeSet
+from .hedge import Hedging
+from .singleflight import SingleFlight
+from .transport import get_transport, register_transport, close_transports, UnixConnectionPool, WebSocketTransport
+from .replay import TrafficLog, Replay, RecordingPool, ReplayPool
+from .limits import TokenBucket, AdaptiveLimit
+from .metrics import Metrics, default_metrics
+from .codec import Codec, get_codec
+from .retry import RetryPolicy, RetryBudget, CircuitBreaker, CircuitOpenError
 
-from .async_request import acall
\ No newline at end of file
+from .async_request import acall
+from .async_request import acall_batch
+from .async_request import AsyncClient
\ No newline at end of file
@@ -2,6 +2,10 @@ from . import call
 from .request import Request
 
 
+def get_dgp(url):
+    return call(url, "database_api", "get_dynamic_global_properties", [])
+
+
 def lookup_account_names(url, names):
     return call(url, "database_api", "lookup_account_names", [names])
 
@@ -29,4 +33,17 @@ def get_blocks_history(url, block_num, limit):
 
 
 def get_ops_history(url, from_op, limit, type=0):
-    return call(url, "blockchain_history_api", "get_ops_history", [from_op, limit, type])
\ No newline at end of file
+    return call(url, "blockchain_history_api", "get_ops_history", [from_op, limit, type])
+
+
+def iter_blocks_history(url, block_num, limit):
+    start = block_num + limit
+    return Request().call_stream(url, "blockchain_history_api", "get_blocks_history", [start, limit])
+
+
+def iter_ops_history(url, from_op, limit, type=0):
+    return Request().call_stream(url, "blockchain_history_api", "get_ops_history", [from_op, limit, type])
+
+
+def get_ops_history_by_time(url, from_time, to_time, from_op, limit):
+    return call(url, "blockchain_history_api", "get_ops_history_by_time", [from_time, to_time, from_op, limit])
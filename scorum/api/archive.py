@@ -0,0 +1,146 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+from scorum.utils.files import create_dir
+
+INDEX_ENTRY = struct.Struct("<QI")
+
+
+class _Segment:
+    def __init__(self, data_path, index_path, size):
+        self.data_path = data_path
+        self.index_path = index_path
+        self._data = None
+        self._index = None
+
+        if not os.path.exists(index_path):
+            with open(index_path, "wb") as f:
+                f.truncate(size * INDEX_ENTRY.size)
+        if not os.path.exists(data_path):
+            open(data_path, "wb").close()
+
+    def _map(self, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self, slot):
+        if self._index is None:
+            self._index = self._map(self.index_path)
+        offset, length = INDEX_ENTRY.unpack_from(self._index, slot * INDEX_ENTRY.size)
+        if length == 0:
+            return None
+
+        if self._data is None or len(self._data) < offset + length:
+            self.invalidate()
+            self._index = self._map(self.index_path)
+            self._data = self._map(self.data_path)
+        return memoryview(self._data)[offset:offset + length]
+
+    def write(self, slot, raw):
+        with open(self.data_path, "ab") as f:
+            offset = f.tell()
+            f.write(raw)
+        with open(self.index_path, "r+b") as f:
+            f.seek(slot * INDEX_ENTRY.size)
+            f.write(INDEX_ENTRY.pack(offset, len(raw)))
+
+    def invalidate(self):
+        for m in (self._data, self._index):
+            if m is not None:
+                try:
+                    m.close()
+                except BufferError:
+                    # a reader still holds a view into the old mapping, let it be collected with the view
+                    pass
+        self._data = None
+        self._index = None
+
+
+class BlockArchive:
+    """ Append-only on-disk block store split into segments of `segment_size` blocks.
+
+        Every segment is a data file of individually zlib-compressed JSON blocks and an index file of fixed-width
+        (offset, length) entries, one per block number, so any block is located in O(1) through mmap.
+
+        A stored block is never overwritten, so extend() only stores blocks at or below the last irreversible block
+        seen in a get_dynamic_global_properties response, which can not be forked out any more.
+
+        :param str path: directory holding the segment files, created when missing
+        :param int segment_size: number of block numbers covered by one segment
+        :param int level: zlib compression level
+    """
+    def __init__(self, path, segment_size=10000, level=6):
+        create_dir(path)
+        self._path = path
+        self._segment_size = segment_size
+        self._level = level
+        self._lock = threading.Lock()
+        self._segments = dict()
+        self.last_irreversible_block_num = 0
+
+    def _segment(self, block_num):
+        first = block_num - block_num % self._segment_size
+        segment = self._segments.get(first)
+        if segment is None:
+            name = os.path.join(self._path, "blocks-%010d" % first)
+            segment = _Segment(name + ".dat", name + ".idx", self._segment_size)
+            self._segments[first] = segment
+        return segment, block_num - first
+
+    def append(self, block_num, block):
+        raw = zlib.compress(json.dumps(block, separators=(",", ":")).encode("utf-8"), self._level)
+        with self._lock:
+            segment, slot = self._segment(block_num)
+            if segment.read(slot) is None:
+                segment.write(slot, raw)
+
+    def irreversible(self, dgp):
+        """ Learn the last irreversible block from a get_dynamic_global_properties result, None is ignored """
+        if isinstance(dgp, dict):
+            self.last_irreversible_block_num = max(self.last_irreversible_block_num,
+                                                   dgp.get("last_irreversible_block_num", 0))
+
+    def extend(self, blocks):
+        """ Store (block_num, block) pairs that are irreversible, :return: the number of pairs stored """
+        stored = 0
+        for block_num, block in blocks:
+            if block_num <= self.last_irreversible_block_num:
+                self.append(block_num, block)
+                stored += 1
+        return stored
+
+    def get_raw(self, block_num):
+        """ :return: memoryview of the compressed block or None when it is not archived """
+        with self._lock:
+            segment, slot = self._segment(block_num)
+            return segment.read(slot)
+
+    def get(self, block_num):
+        raw = self.get_raw(block_num)
+        return None if raw is None else json.loads(zlib.decompress(raw).decode("utf-8"))
+
+    def has(self, block_num):
+        return self.get_raw(block_num) is not None
+
+    def has_range(self, start, stop):
+        return all(self.has(n) for n in range(start, stop))
+
+    def iter_raw(self, start, stop):
+        for n in range(start, stop):
+            yield n, self.get_raw(n)
+
+    def iter(self, start, stop):
+        for n in range(start, stop):
+            yield n, self.get(n)
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments.values():
+                segment.invalidate()
+            self._segments.clear()
@@ -1,9 +1,9 @@
-import json
 from . import acall
+from .codec import default_codec
 
 
 def get_result(txt):
-    data = json.loads(txt)
+    data = default_codec.loads(txt)
     if "error" in data:
         print("error response: %s" % data["error"])
 
@@ -14,19 +14,136 @@ def get_result(txt):
     return data["result"]
 
 
-async def get_blocks_history(url, f, limit):
+async def get_blocks_history(url, f, limit, client=None, parse=False):
     start = f + limit
-    return await acall(url, "blockchain_history_api", "get_blocks_history", [start, limit])
+    return await acall(url, "blockchain_history_api", "get_blocks_history", [start, limit], client=client, parse=parse)
 
 
-async def get_blocks(url, f, limit):
+async def get_blocks(url, f, limit, client=None, parse=False):
     start = f + limit - 1
-    return await acall(url, "blockchain_history_api", "get_blocks", [start, limit])
+    return await acall(url, "blockchain_history_api", "get_blocks", [start, limit], client=client, parse=parse)
 
 
-async def get_dgp(url):
-    txt = await acall(url, "database_api", "get_dynamic_global_properties")
-    try:
-        return get_result(txt)
-    except Exception as e:
-        raise e
+async def get_dgp(url, client=None):
+    return await acall(url, "database_api", "get_dynamic_global_properties", client=client, parse=True)
+
+
+def aiter_blocks_history(url, f, limit, client):
+    start = f + limit
+    return client.call_stream(url, "blockchain_history_api", "get_blocks_history", [start, limit])
+
+
+def aiter_ops_history(url, from_op, limit, client, type=0):
+    return client.call_stream(url, "blockchain_history_api", "get_ops_history", [from_op, limit, type])
+
+
+async def get_dynamic_global_properties(url, client=None):
+    return await get_dgp(url, client=client)
+
+
+async def get_account_count(url, client=None):
+    return await acall(url, "database_api", "get_account_count", [], client=client, parse=True)
+
+
+async def lookup_account_names(url, names, client=None):
+    return await acall(url, "database_api", "lookup_account_names", [names], client=client, parse=True)
+
+
+async def lookup_accounts(url, start_account, limit, client=None):
+    return await acall(url, "database_api", "lookup_accounts", [start_account, limit], client=client, parse=True)
+
+
+async def get_witnesses(url, ids, client=None):
+    return await acall(url, "database_api", "get_witnesses", [ids], client=client, parse=True)
+
+
+async def get_trending_tags(url, after_tag, limit, client=None):
+    return await acall(url, "tags_api", "get_trending_tags", [after_tag, limit], client=client, parse=True)
+
+
+async def get_tags_used_by_author(url, author, client=None):
+    return await acall(url, "tags_api", "get_tags_used_by_author", [author], client=client, parse=True)
+
+
+async def get_tags_by_category(url, domain, category, client=None):
+    return await acall(url, "tags_api", "get_tags_by_category", [domain, category], client=client, parse=True)
+
+
+async def get_discussions(url, method, query, client=None):
+    """ :param str method: one of methods.DISCUSSIONS_METHODS """
+    return await acall(url, "tags_api", method, [query], client=client, parse=True)
+
+
+async def get_discussions_by_trending(url, query, client=None):
+    return await get_discussions(url, "get_discussions_by_trending", query, client=client)
+
+
+async def get_discussions_by_created(url, query, client=None):
+    return await get_discussions(url, "get_discussions_by_created", query, client=client)
+
+
+async def get_discussions_by_hot(url, query, client=None):
+    return await get_discussions(url, "get_discussions_by_hot", query, client=client)
+
+
+async def get_discussions_by_author(url, query, client=None):
+    return await get_discussions(url, "get_discussions_by_author", query, client=client)
+
+
+async def get_content(url, author, permlink, client=None):
+    return await acall(url, "tags_api", "get_content", [author, permlink], client=client, parse=True)
+
+
+async def get_comments(url, parent_author, parent_permlink, depth, client=None):
+    return await acall(url, "tags_api", "get_comments", [parent_author, parent_permlink, depth],
+                       client=client, parse=True)
+
+
+async def get_stats_for_time(url, open_time, interval, client=None):
+    return await acall(url, "blockchain_statistics_api", "get_stats_for_time", [open_time, interval],
+                       client=client, parse=True)
+
+
+async def get_stats_for_interval(url, start_time, end_time, client=None):
+    return await acall(url, "blockchain_statistics_api", "get_stats_for_interval", [start_time, end_time],
+                       client=client, parse=True)
+
+
+async def get_lifetime_stats(url, client=None):
+    return await acall(url, "blockchain_statistics_api", "get_lifetime_stats", [], client=client, parse=True)
+
+
+async def get_ops_history(url, from_op, limit, type=0, client=None):
+    return await acall(url, "blockchain_history_api", "get_ops_history", [from_op, limit, type],
+                       client=client, parse=True)
+
+
+async def get_ops_history_by_time(url, from_time, to_time, from_op, limit, client=None):
+    return await acall(url, "blockchain_history_api", "get_ops_history_by_time", [from_time, to_time, from_op, limit],
+                       client=client, parse=True)
+
+
+async def get_ops_in_block(url, start, limit, client=None):
+    return await acall(url, "blockchain_history_api", "get_ops_in_block", [start, limit], client=client, parse=True)
+
+
+async def get_transaction(url, trx_id, client=None):
+    return await acall(url, "blockchain_history_api", "get_transaction", [trx_id], client=client, parse=True)
+
+
+async def get_block_header(url, block_num, client=None):
+    return await acall(url, "blockchain_history_api", "get_block_header", [block_num], client=client, parse=True)
+
+
+async def get_block_headers_history(url, block_num, limit, client=None):
+    start = block_num + limit
+    return await acall(url, "blockchain_history_api", "get_block_headers_history", [start, limit],
+                       client=client, parse=True)
+
+
+async def get_block(url, block_num, client=None):
+    return await acall(url, "blockchain_history_api", "get_block", [block_num], client=client, parse=True)
+
+
+async def get_chain_capital(url, client=None):
+    return await acall(url, "chain_api", "get_chain_capital", [], client=client, parse=True)
@@ -0,0 +1,363 @@
+import asyncio
+import inspect
+import json
+import os
+from collections import deque
+from itertools import islice
+
+from scorum.api.async_request import AsyncClient
+from scorum.api.limits import AdaptiveLimit
+from scorum.api.checkpoint import Checkpoint
+from scorum.api.methods import DISCUSSIONS_METHODS
+from scorum.utils.logger import get_logger
+
+log = get_logger("async_helpers")
+
+ACCOUNT_NAME_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+# from_op asking get_ops_history for the newest operations
+LAST_OP = 0xFFFFFFFF
+
+
+def shard_bounds(shards):
+    """ Split the account name space by first letter into `shards` [lower, upper) ranges, upper None is open. """
+    shards = max(1, min(shards, len(ACCOUNT_NAME_LETTERS)))
+    step = len(ACCOUNT_NAME_LETTERS) / float(shards)
+    bounds = [""] + [ACCOUNT_NAME_LETTERS[int(i * step)] for i in range(1, shards)] + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+async def _result(client, url, api, method, args):
+    r = await client.call(url, api, method, args, parse=True)
+    if r is None:
+        raise ConnectionError("Failed to call %s %s from: %s" % (method, args, url))
+    return r
+
+
+async def _scan_names(client, url, lower, upper, limit, queue):
+    start = lower
+    last = None
+
+    while True:
+        r = await _result(client, url, "database_api", "lookup_accounts", [start, limit])
+
+        names = [n for n in r if n != last and (upper is None or n < upper)]
+        if names:
+            await queue.put(names)
+
+        if len(r) < limit or (upper is not None and r[-1] >= upper):
+            return
+
+        start = last = r[-1]
+
+
+async def _lookup_objects(client, url, queue, callback):
+    while True:
+        names = await queue.get()
+        if names is None:
+            return
+
+        objects = await _result(client, url, "database_api", "lookup_account_names", [names])
+        r = callback(objects)
+        if inspect.isawaitable(r):
+            await r
+
+
+async def ascan_accounts(url, callback, limit=100, shards=1, workers=4, client=None):
+    """ Scan all accounts passing pages of account objects to callback as soon as they arrive.
+
+        Pages of names from lookup_accounts are pipelined into `workers` concurrent lookup_account_names calls,
+        and with `shards` > 1 the name space is split by first letter and the shards are paged concurrently.
+        Pages may reach the callback out of name order. The callback may be a coroutine function.
+    """
+    own_client = client is None
+    if own_client:
+        client = AsyncClient(concurrency=AdaptiveLimit())
+
+    queue = asyncio.Queue(maxsize=workers * 2)
+
+    async def produce():
+        await asyncio.gather(*[_scan_names(client, url, lower, upper, limit, queue)
+                               for lower, upper in shard_bounds(shards)])
+        for _ in range(workers):
+            await queue.put(None)
+
+    tasks = [asyncio.ensure_future(produce())]
+    tasks += [asyncio.ensure_future(_lookup_objects(client, url, queue, callback)) for _ in range(workers)]
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        if own_client:
+            await client.close()
+
+
+async def _lookup_chunk(client, url, names, retries):
+    for attempt in range(retries):
+        if attempt > 0:
+            # the node may be overloaded, back off like the client does between its own retries
+            delay = client.retry.delay(attempt)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+
+        r = await client.call(url, "database_api", "lookup_account_names", [names], parse=True)
+        if r is not None:
+            return r
+        log.warning("lookup of %d accounts starting with %s failed", len(names), names[0])
+
+    raise ConnectionError("Failed to look up accounts starting with %s from: %s" % (names[0], url))
+
+
+async def alookup_accounts_bulk(url, names, chunk_size=100, concurrency=8, retries=3, client=None):
+    """ Async iterator over account objects for any iterable of names, in input order.
+
+        Names are looked up in chunks of `chunk_size` with at most `concurrency` chunks in flight; a failed chunk
+        is retried alone up to `retries` times, with the client's RetryPolicy backoff in between.
+    """
+    own_client = client is None
+    if own_client:
+        client = AsyncClient(concurrency=AdaptiveLimit())
+
+    it = iter(names)
+    pending = deque()
+
+    def schedule():
+        chunk = list(islice(it, chunk_size))
+        if chunk:
+            pending.append(asyncio.ensure_future(_lookup_chunk(client, url, chunk, retries)))
+
+    try:
+        for _ in range(concurrency):
+            schedule()
+
+        while pending:
+            objects = await pending.popleft()
+            schedule()
+            for obj in objects:
+                yield obj
+    finally:
+        for task in pending:
+            task.cancel()
+        if own_client:
+            await client.close()
+
+
+async def aget_all_account_names(url, client=None):
+    """ Async variant of helpers.get_all_account_names. """
+    own_client = client is None
+    if own_client:
+        client = AsyncClient(concurrency=AdaptiveLimit())
+
+    accounts = []
+    start_account = ""
+
+    try:
+        while True:
+            r = await _result(client, url, "database_api", "lookup_accounts", [start_account, 100])
+            accounts += r if len(accounts) == 0 else r[1:]
+
+            if not accounts or start_account == accounts[-1]:
+                break
+            start_account = accounts[-1]
+
+        count = await _result(client, url, "database_api", "get_account_count", [])
+    finally:
+        if own_client:
+            await client.close()
+
+    assert count == len(accounts)
+
+    return accounts
+
+
+async def aget_all_account_objects(url, chunk_size=100, concurrency=8, client=None):
+    """ Async variant of helpers.get_all_account_objects. """
+    own_client = client is None
+    if own_client:
+        client = AsyncClient(concurrency=AdaptiveLimit())
+
+    try:
+        names = await aget_all_account_names(url, client)
+        r = [obj async for obj in alookup_accounts_bulk(url, names, chunk_size, concurrency, client=client)]
+    finally:
+        if own_client:
+            await client.close()
+
+    assert len(r) == len(names)
+
+    return r
+
+
+async def aiter_post_pages(url, method="get_discussions_by_created", query=None, checkpoint=None, limit=100,
+                           client=None):
+    """ Async iterator variant of helpers.iter_post_pages. """
+    if method not in DISCUSSIONS_METHODS:
+        raise ValueError("%s is not one of %s" % (method, DISCUSSIONS_METHODS))
+
+    own_client = client is None
+    if own_client:
+        client = AsyncClient(concurrency=AdaptiveLimit())
+
+    query = dict(query or {})
+    query["limit"] = limit
+    checkpoint = Checkpoint(checkpoint) if checkpoint is not None else None
+    skip_first = False
+
+    if checkpoint is not None:
+        author, permlink = checkpoint.load()
+        if author is not None:
+            query["start_author"], query["start_permlink"] = author, permlink
+            skip_first = True
+
+    try:
+        while True:
+            r = await _result(client, url, "tags_api", method, [query])
+
+            posts = r[1:] if skip_first else r
+            if not posts:
+                return
+
+            yield posts
+
+            query["start_author"] = posts[-1]["author"]
+            query["start_permlink"] = posts[-1]["permlink"]
+            if checkpoint is not None:
+                checkpoint.save(query["start_author"], query["start_permlink"])
+
+            if len(r) < limit:
+                return
+            skip_first = True
+    finally:
+        if own_client:
+            await client.close()
+
+
+async def aiter_posts(url, method="get_discussions_by_created", query=None, checkpoint=None, limit=100, client=None):
+    """ Async iterator variant of helpers.iter_posts. """
+    async for posts in aiter_post_pages(url, method, query, checkpoint, limit, client):
+        for post in posts:
+            yield post
+
+
+async def aget_all_posts(url, start_author=None, start_permlink=None, client=None):
+    """ Async variant of helpers.get_all_posts. """
+    query = dict()
+    if start_author is not None:
+        query["start_author"] = start_author
+    if start_permlink is not None:
+        query["start_permlink"] = start_permlink
+
+    return [post async for post in aiter_posts(url, query=query, client=client)]
+
+
+async def acrawl_posts_to_jsonl(url, path, method="get_discussions_by_created", query=None, checkpoint=None,
+                                limit=100, client=None):
+    """ Async variant of helpers.crawl_posts_to_jsonl, file writes block the loop briefly once per page. """
+    checkpoint = checkpoint or path + ".checkpoint"
+    written = 0
+
+    with open(path, "a") as f:
+        async for posts in aiter_post_pages(url, method, query, checkpoint, limit, client):
+            f.writelines(json.dumps(post) + "\n" for post in posts)
+            f.flush()
+            os.fsync(f.fileno())
+            written += len(posts)
+
+    return written
+
+
+def op_windows(start, stop, window):
+    """ Split the op sequence range [start, stop) into [lower, upper) windows of at most `window` ops. """
+    return [(lower, min(lower + window, stop)) for lower in range(start, stop, window)]
+
+
+def ops_in_window(result, lower, upper, predicate=None):
+    """ :return: (seq, op) pairs of a get_ops_history result within [lower, upper), in sequence order
+
+        The node pages backwards from from_op, so a page may reach below `lower` (e.g. when `type` filters ops
+        out); those ops belong to the previous window and are dropped here.
+    """
+    ops = sorted(((seq, op) for seq, op in result if lower <= seq < upper), key=lambda pair: pair[0])
+    if predicate is not None:
+        ops = [(seq, op) for seq, op in ops if predicate(op)]
+    return ops
+
+
+async def _ops_window(client, url, lower, upper, type, predicate):
+    r = await _result(client, url, "blockchain_history_api", "get_ops_history", [upper - 1, upper - lower, type])
+    return ops_in_window(r, lower, upper, predicate)
+
+
+async def last_op(client, url, type=0):
+    """ :return: sequence number of the newest operation of `type`, None when there is none """
+    r = await _result(client, url, "blockchain_history_api", "get_ops_history", [LAST_OP, 1, type])
+    return max(seq for seq, _ in r) if r else None
+
+
+async def ascan_ops_history(url, start=0, stop=None, window=100, concurrency=8, type=0, predicate=None,
+                            client=None):
+    """ Async iterator over (seq, op) pairs of the operation history in [start, stop), in sequence order.
+
+        The range is split into windows of `window` ops with at most `concurrency` windows in flight. `type` is the
+        node side get_ops_history filter and `predicate(op)` an additional client side one. `stop` defaults to
+        the newest operation at the time of the call.
+    """
+    own_client = client is None
+    if own_client:
+        client = AsyncClient(concurrency=AdaptiveLimit())
+
+    pending = deque()
+
+    try:
+        if stop is None:
+            last = await last_op(client, url, type)
+            stop = last + 1 if last is not None else start
+
+        windows = iter(op_windows(start, stop, window))
+
+        def schedule():
+            for lower, upper in islice(windows, 1):
+                pending.append(asyncio.ensure_future(_ops_window(client, url, lower, upper, type, predicate)))
+
+        for _ in range(concurrency):
+            schedule()
+
+        while pending:
+            ops = await pending.popleft()
+            schedule()
+            for op in ops:
+                yield op
+    finally:
+        for task in pending:
+            task.cancel()
+        if own_client:
+            await client.close()
+
+
+async def ascan_ops_history_by_time(url, from_time, to_time, limit=100, predicate=None, client=None):
+    """ Async iterator variant of helpers.scan_ops_history_by_time. """
+    own_client = client is None
+    if own_client:
+        client = AsyncClient(concurrency=AdaptiveLimit())
+
+    from_op = LAST_OP
+
+    try:
+        while True:
+            r = await _result(client, url, "blockchain_history_api", "get_ops_history_by_time",
+                              [from_time, to_time, from_op, limit])
+
+            for seq, op in ops_in_window(r, 0, from_op + 1, predicate)[::-1]:
+                yield seq, op
+
+            if len(r) < limit:
+                return
+            from_op = min(seq for seq, _ in r) - 1
+            if from_op < 0:
+                return
+    finally:
+        if own_client:
+            await client.close()
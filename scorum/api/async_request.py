@@ -1,27 +1,421 @@
 import aiohttp
 import asyncio
-import json
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
 
-from scorum.api.methods import get_api_name, to_payload
+from scorum.api.codec import default_codec
+from scorum.api.compression import ACCEPT_ENCODING, decompress, decompressor
+from scorum.api.jsonstream import ResultStream
+from scorum.api.metrics import default_metrics, describe
+from scorum.api.methods import get_api_name, to_payload, to_batch_payload, from_batch_response, batch_rejected
+from scorum.api.nodes import select_endpoint, report
+from scorum.api.retry import default_policy, CircuitOpenError, RETRY_STATUSES
+from scorum.api.transport import AsyncWebSocket, BufferedResponse
+from scorum.utils.logger import get_logger
 
+log = get_logger("async_request")
 
-async def acall(url, api, method, args=[], retries=5):
-    payload = to_payload(method, api, args)
+HEADERS = {'Content-Type': "application/json"}
+
+
+def _is_websocket(endpoint):
+    return endpoint.startswith(("ws://", "wss://"))
+
+
+def _chunks_of(data):
+    async def chunks(chunk_size):
+        for i in range(0, len(data), chunk_size):
+            yield data[i:i + chunk_size]
+    return chunks
+
+
+def _decode(data):
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        log.error("undecodable response: %s", e)
+        return None
+
+
+class AsyncClient:
+    """ Owns one aiohttp session and connection pool shared by every call made through it.
+
+        :param int limit: total number of simultaneous connections
+        :param int limit_per_host: simultaneous connections to one endpoint, 0 means no limit
+        :param int ttl_dns_cache: seconds to cache resolved DNS records
+        :param float keepalive_timeout: seconds an idle connection is kept open
+        :param ResponseCache cache: cache consulted before cacheable methods are sent
+        :param Hedging hedging: hedged requests policy for read methods
+        :param RetryPolicy retry: backoff, timeouts, budget and circuit breaker, default_policy when omitted
+        :param TokenBucket rate_limiter: optional limit of requests per second
+        :param AdaptiveLimit concurrency: optional AIMD limit of requests in flight, the block and ops fetchers set
+            one on the clients they create
+        :param Metrics metrics: where per-method statistics are recorded, default_metrics when omitted
+        :param Codec codec: JSON codec, the fastest installed one when omitted
+        :param SingleFlight singleflight: merges identical calls in flight at the same time
+        :param bool compress: ask for gzip/deflate responses, worth it when bandwidth rather than CPU is the limit
+        :param TrafficLog recorder: log every exchange is appended to
+        :param Replay replay: recorded exchanges answering requests instead of the network
+    """
+    def __init__(self, limit=100, limit_per_host=0, ttl_dns_cache=300, keepalive_timeout=30, cache=None,
+                 hedging=None, retry=None, rate_limiter=None, concurrency=None, metrics=None, codec=None,
+                 singleflight=None, compress=False, recorder=None, replay=None):
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._ttl_dns_cache = ttl_dns_cache
+        self._keepalive_timeout = keepalive_timeout
+        self._cache = cache
+        self._hedging = hedging
+        self._retry = retry or default_policy
+        self._rate_limiter = rate_limiter
+        self._metrics = metrics or default_metrics
+        self._codec = codec or default_codec
+        self._singleflight = singleflight
+        self._recorder = recorder
+        self._replay = replay
+        # responses are decompressed here rather than by aiohttp so that metrics count the bytes on the wire
+        self._headers = dict(HEADERS)
+        self._headers["Accept-Encoding"] = ACCEPT_ENCODING if compress else "identity"
+        self.concurrency = concurrency
+        self._session = None
+        self._unix_sessions = dict()
+        self._websockets = dict()
+
+    @property
+    def retry(self):
+        """ :return: the RetryPolicy calls through this client follow """
+        return self._retry
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                ttl_dns_cache=self._ttl_dns_cache,
+                keepalive_timeout=self._keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, auto_decompress=False)
+        return self._session
+
+    def _loads(self, data):
+        try:
+            return self._codec.loads(data)
+        except (TypeError, ValueError):
+            return None
+
+    async def call(self, url, api, method, args=[], retries=5, parse=False):
+        """ :return: response text, or the parsed result when parse is True """
+        cacheable = self._cache is not None and self._cache.cacheable(method)
+
+        if cacheable:
+            found, result = self._cache.get(method, args)
+            if found:
+                return result if parse else self._codec.dumps({"jsonrpc": "2.0", "id": "0", "result": result}).decode()
+
+        if self._singleflight is not None and self._singleflight.applies(method):
+            data = await self._singleflight.ado(self._singleflight.key(url, api, method, args),
+                                                lambda: self._call(url, api, method, args, retries))
+        else:
+            data = await self._call(url, api, method, args, retries)
+        if data is None:
+            return None
+
+        if not parse and not cacheable:
+            return _decode(data)
+
+        response = self._loads(data)
+        if not isinstance(response, dict) or "result" not in response:
+            log.error("wrong response to %s: %s", method, data[:1000])
+            return None if parse else _decode(data)
+
+        result = response["result"]
+
+        if cacheable:
+            if self._cache.pending_irreversible(method, args, result):
+                # the block may have become irreversible since the last dgp the cache has seen
+                await self.call(url, "database_api", "get_dynamic_global_properties")
+            self._cache.put(method, args, result, len(data))
+
+        return result if parse else _decode(data)
+
+    async def call_stream(self, url, api, method, args=[], chunk_size=64 * 1024):
+        """ Async iterator over the elements of an array result, yielded while the response is being received.
+
+            Only the element being received is kept in memory. The call is not retried since elements may already
+            have been consumed when an error occurs.
+        """
+        body = self._codec.dumps(to_payload(method, api, args))
+        endpoint = select_endpoint(url)
+        parser = ResultStream(self._codec)
+        connect, read = self._retry.timeouts()
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+        size = 0
+        ts = time.time()
+
+        if self._rate_limiter is not None:
+            await self._rate_limiter.aacquire()
+
+        if self.concurrency is not None:
+            await self.concurrency.acquire()
+        try:
+            async with self._stream(endpoint, body, timeout) as (resp, chunks):
+                if resp.status != 200:
+                    raise ConnectionError("%s responded with %d %s" % (endpoint, resp.status, resp.reason))
+
+                d = decompressor(resp.headers.get("Content-Encoding"))
+                async for chunk in chunks(chunk_size):
+                    size += len(chunk)
+                    for element in parser.feed(d.decompress(chunk)):
+                        yield element
+
+                for element in parser.feed(d.flush()):
+                    yield element
+
+            for element in parser.close():
+                yield element
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError):
+            self._metrics.observe(api, method, endpoint, time.time() - ts, len(body), size, False, True)
+            report(url, endpoint, None, False)
+            raise
+        finally:
+            # a stream's duration depends on the consumer, so it is no signal for the limit either way
+            if self.concurrency is not None:
+                self.concurrency.release(ok=None)
+
+        self._metrics.observe(api, method, endpoint, time.time() - ts, len(body), size)
+        report(url, endpoint, time.time() - ts, True)
+
+    async def _call(self, url, api, method, args, retries):
+        payload = to_payload(method, api, args)
+
+        if self._hedging is None or not self._hedging.applies(method):
+            return await self._send(url, payload, retries)
+
+        # selected once: selecting has side effects, e.g. it spends the probe of an ejected node
+        first = select_endpoint(url)
+        return await self._hedging.arun(self._send(url, payload, retries, first=first),
+                                        self._send(url, payload, retries, {first}))
+
+    async def call_batch(self, url, calls, retries=5, chunk_size=100):
+        """ Send many (api, method, args) calls as concurrent JSON-RPC batches of at most chunk_size calls.
+
+            A batch rejected by the node is split in halves until it is accepted.
+
+            :return: list of parsed results in the order of calls, None for failed calls
+        """
+        calls = list(calls)
+        chunks = [calls[i:i + chunk_size] for i in range(0, len(calls), chunk_size)]
+        results = await asyncio.gather(*[self._call_chunk(url, chunk, retries) for chunk in chunks])
+        return [r for chunk in results for r in chunk]
+
+    async def _call_chunk(self, url, calls, retries):
+        payload = to_batch_payload(calls)
+        status, data = await self._exchange(url, payload if len(calls) > 1 else payload[0], retries)
+        response = self._loads(data) if status == 200 else None
+
+        if len(calls) == 1:
+            return from_batch_response([response] if isinstance(response, dict) else [], 1)
+
+        if isinstance(response, list):
+            return from_batch_response(response, len(calls))
+
+        if not batch_rejected(status, response):
+            log.error("batch of %d calls to %s failed", len(calls), url)
+            return [None] * len(calls)
+
+        log.warning("batch of %d calls rejected by %s, splitting", len(calls), url)
+        half = len(calls) // 2
+        return await self._call_chunk(url, calls[:half], retries) + await self._call_chunk(url, calls[half:], retries)
+
+    async def _send(self, url, payload, retries, exclude=frozenset(), first=None):
+        """ :return: the response body, None when the call failed """
+        status, data = await self._exchange(url, payload, retries, exclude, first)
+        return data if status == 200 else None
+
+    async def _exchange(self, url, payload, retries, exclude=frozenset(), first=None):
+        """ :return: tuple of (status, body) of the last response, (None, None) when no request got one """
+        policy = self._retry
+        deadline = policy.start()
+        failed = set()
+        attempt = 0
+        body = self._codec.dumps(payload)
+        api, method = describe(payload)
+
+        while attempt < retries:
+            # the first attempt goes to `first` when the caller has already selected it
+            endpoint, first = first or select_endpoint(url, failed | exclude), None
+
+            if not policy.allow(endpoint):
+                if endpoint in failed:
+                    raise CircuitOpenError("Circuit is open for: %s" % endpoint)
+                failed.add(endpoint)
+                continue
+
+            if attempt > 0:
+                delay = policy.delay(attempt, deadline)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+
+            attempt += 1
+            connect, read = policy.timeouts(deadline)
+            timeout = aiohttp.ClientTimeout(total=policy.remaining(deadline), sock_connect=connect, sock_read=read)
+
+            ts = time.time()
+
+            try:
+                resp, data, latency, size = await self._post(endpoint, body, timeout, method)
+
+                self._metrics.observe(api, method, endpoint, latency, len(body), size, attempt > 1,
+                                      resp.status != 200)
+                report(url, endpoint, latency, resp.status == 200)
+                policy.record(endpoint, resp.status < 500)
 
-    for i in range(0, retries):
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as resp:
                 if resp.status == 200:
-                    i = retries
-                    # print("request: %s" % json.dumps(payload))
-                    data = await resp.content.read()
-                    try:
-                        return data.decode("utf-8")
-                    except Exception as e:
-                        print("error: %s" % str(e))
-                        print("request: %s" % json.dumps(payload))
-                        print("response: " + data)
+                    if self._hedging is not None:
+                        self._hedging.record(latency)
+                    return resp.status, data
+
+                log.warning("%s responded with %d %s", endpoint, resp.status, resp.reason)
+                if resp.status not in RETRY_STATUSES:
+                    return resp.status, data
+                failed.add(endpoint)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError) as e:
+                log.error("error during request to %s: %r", endpoint, e)
+                self._metrics.observe(api, method, endpoint, time.time() - ts, len(body), 0, attempt > 1, True)
+                report(url, endpoint, None, False)
+                policy.record(endpoint, False)
+                failed.add(endpoint)
+
+        return None, None
 
+    async def _post(self, endpoint, body, timeout, method=None):
+        if self._rate_limiter is not None:
+            await self._rate_limiter.aacquire()
+
+        if self.concurrency is not None:
+            await self.concurrency.acquire()
+        latency, ok = None, False
+        ts = time.time()
+
+        try:
+            if self._replay is not None:
+                exchange = self._replay.next(body)
+                await asyncio.sleep(self._replay.delay(exchange))
+                resp, data = exchange.response(), exchange.data
+            else:
+                if _is_websocket(endpoint):
+                    data = await self._websocket(endpoint).call(body, timeout.sock_read)
+                    resp = BufferedResponse(200, "OK", None, data)
                 else:
-                    print("error during request")
-                    asyncio.sleep(0.5)
+                    session, target = self._route(endpoint)
+                    async with session.post(target, data=body, headers=self._headers, timeout=timeout) as resp:
+                        data = await resp.content.read()
+                if self._recorder is not None:
+                    self._recorder.append(endpoint, body, resp.status, resp.reason,
+                                          resp.headers.get("Content-Encoding"), data, time.time() - ts)
+            size = len(data)
+            data = decompress(data, resp.headers.get("Content-Encoding"))
+            latency = time.time() - ts
+            ok = resp.status < 500 and resp.status != 429
+            return resp, data, latency, size
+        except asyncio.CancelledError:
+            # e.g. the loser of a hedged request, which says nothing about the node
+            ok = None
+            raise
+        finally:
+            if self.concurrency is not None:
+                self.concurrency.release(latency, ok, method)
+
+    @asynccontextmanager
+    async def _stream(self, endpoint, body, timeout):
+        """ Yields the response and an async chunk iterator factory, from the replay or the network. """
+        if self._replay is not None:
+            exchange = self._replay.next(body)
+            await asyncio.sleep(self._replay.delay(exchange))
+            yield exchange.response(), _chunks_of(exchange.data)
+            return
+
+        ts = time.time()
+        received = []
+
+        if _is_websocket(endpoint):
+            # a WebSocket message arrives whole, the parser still gets it chunk by chunk
+            data = await self._websocket(endpoint).call(body, timeout.sock_read)
+            if self._recorder is not None:
+                self._recorder.append(endpoint, body, 200, "OK", None, data, time.time() - ts)
+            yield BufferedResponse(200, "OK", None, data), _chunks_of(data)
+            return
+
+        session, target = self._route(endpoint)
+        async with session.post(target, data=body, headers=self._headers, timeout=timeout) as resp:
+            async def chunks(chunk_size):
+                async for chunk in resp.content.iter_chunked(chunk_size):
+                    if self._recorder is not None:
+                        received.append(chunk)
+                    yield chunk
+
+            yield resp, chunks
+
+        if self._recorder is not None:
+            self._recorder.append(endpoint, body, resp.status, resp.reason, resp.headers.get("Content-Encoding"),
+                                  b"".join(received), time.time() - ts)
+
+    def _route(self, endpoint):
+        """ :return: tuple of (session, url) to POST an HTTP or unix:// endpoint's requests to """
+        url_object = urlparse(endpoint)
+        if url_object.scheme != "unix":
+            return self.session, endpoint
+
+        session = self._unix_sessions.get(url_object.path)
+        if session is None or session.closed:
+            connector = aiohttp.UnixConnector(path=url_object.path, limit=self._limit,
+                                              keepalive_timeout=self._keepalive_timeout)
+            session = aiohttp.ClientSession(connector=connector, auto_decompress=False)
+            self._unix_sessions[url_object.path] = session
+        return session, "http://localhost/"
+
+    def _websocket(self, endpoint):
+        ws = self._websockets.get(endpoint)
+        if ws is None:
+            ws = self._websockets[endpoint] = AsyncWebSocket(endpoint, self.session)
+        return ws
+
+    async def close(self):
+        for ws in self._websockets.values():
+            await ws.close()
+        self._websockets.clear()
+
+        for session in self._unix_sessions.values():
+            await session.close()
+        self._unix_sessions.clear()
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+async def acall(url, api, method, args=[], retries=5, client=None, cache=None, retry=None, parse=False,
+                singleflight=None, compress=False, recorder=None, replay=None):
+    if client is not None:
+        return await client.call(url, api, method, args, retries, parse)
+
+    async with AsyncClient(cache=cache, retry=retry, singleflight=singleflight, compress=compress, recorder=recorder,
+                           replay=replay) as client:
+        return await client.call(url, api, method, args, retries, parse)
+
+
+async def acall_batch(url, calls, retries=5, chunk_size=100, client=None, retry=None):
+    if client is not None:
+        return await client.call_batch(url, calls, retries, chunk_size)
+
+    async with AsyncClient(retry=retry) as client:
+        return await client.call_batch(url, calls, retries, chunk_size)
@@ -0,0 +1,104 @@
+import asyncio
+from collections import deque
+
+from scorum.api import api, async_api
+from scorum.api.async_request import AsyncClient
+from scorum.api.limits import AdaptiveLimit
+
+
+def _numbered(url, f, limit, result):
+    """ :return: (block_num, block) pairs of window [f, f + limit), ConnectionError when the node returned other
+        blocks
+    """
+    # get_blocks_history returns [block_num, block] pairs, get_blocks returns the blocks
+    numbered = [(item[0], item[1]) if isinstance(item, list) else (f + i, item) for i, item in enumerate(result)]
+
+    if [n for n, _ in numbered] != list(range(f, f + limit)):
+        raise ConnectionError("Got %d blocks for [%d, %d) from: %s, is the window past the head block?"
+                              % (len(numbered), f, f + limit, url))
+
+    return numbered
+
+
+async def fetch_window(url, f, limit, history=False, client=None, archive=None):
+    if archive is not None and archive.has_range(f, f + limit):
+        return [block for _, block in archive.iter(f, f + limit)]
+
+    get = async_api.get_blocks_history if history else async_api.get_blocks
+    result = await get(url, f, limit, client=client, parse=True)
+
+    if result is None:
+        raise ConnectionError("Failed to fetch blocks [%d, %d) from: %s" % (f, f + limit, url))
+
+    numbered = _numbered(url, f, limit, result)
+    if archive is not None:
+        if f + limit - 1 > archive.last_irreversible_block_num:
+            archive.irreversible(await async_api.get_dgp(url, client=client))
+        archive.extend(numbered)
+
+    return [block for _, block in numbered]
+
+
+def iter_blocks(url, start, stop, window=100, archive=None):
+    """ Yield blocks [start, stop) in order through api.get_blocks_history, reading archived windows from disk. """
+    for f in range(start, stop, window):
+        limit = min(window, stop - f)
+
+        if archive is not None and archive.has_range(f, f + limit):
+            for _, block in archive.iter(f, f + limit):
+                yield block
+            continue
+
+        result = api.get_blocks_history(url, f, limit)
+        if result is None:
+            raise ConnectionError("Failed to fetch blocks [%d, %d) from: %s" % (f, f + limit, url))
+
+        numbered = _numbered(url, f, limit, result)
+        if archive is not None:
+            if f + limit - 1 > archive.last_irreversible_block_num:
+                archive.irreversible(api.get_dgp(url))
+            archive.extend(numbered)
+
+        for _, block in numbered:
+            yield block
+
+
+async def fetch_blocks(url, start, stop, window=100, concurrency=8, history=False, client=None, archive=None):
+    """ Yield blocks [start, stop) strictly in order, fetching up to `concurrency` windows in parallel.
+
+        Windows are only requested ahead of the consumer, so at most `concurrency * window` blocks are buffered.
+        A window the node does not return in full, e.g. past its head block, raises ConnectionError.
+
+        :param int window: number of blocks requested per call
+        :param bool history: use get_blocks_history instead of get_blocks
+        :param AsyncClient client: client to route calls through, a temporary one with an AdaptiveLimit is used when
+            omitted
+        :param BlockArchive archive: archive consulted before the node and filled with fetched irreversible blocks
+    """
+    own_client = client is None
+    if own_client:
+        client = AsyncClient(concurrency=AdaptiveLimit())
+
+    windows = iter(range(start, stop, window))
+    pending = deque()
+
+    def schedule():
+        for f in windows:
+            limit = min(window, stop - f)
+            pending.append(asyncio.ensure_future(fetch_window(url, f, limit, history, client, archive)))
+            return
+
+    try:
+        for _ in range(concurrency):
+            schedule()
+
+        while pending:
+            blocks = await pending.popleft()
+            schedule()
+            for block in blocks:
+                yield block
+    finally:
+        for task in pending:
+            task.cancel()
+        if own_client:
+            await client.close()
@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def _block_num_arg(args, result):
+    return args[0] if args else None
+
+
+def _block_num_result(args, result):
+    return result.get("block_num") if isinstance(result, dict) else None
+
+
+# methods whose response never changes once the block it belongs to is irreversible
+IMMUTABLE_METHODS = {
+    "get_block": _block_num_arg,
+    "get_block_header": _block_num_arg,
+    "get_ops_in_block": _block_num_arg,
+    "get_transaction": _block_num_result,
+}
+
+# methods that are cheap to serve slightly stale
+TTL_METHODS = {"get_dynamic_global_properties", "lookup_account_names", "get_account_count"}
+
+
+class ResponseCache:
+    """ Thread-safe LRU cache of RPC results bounded by number of entries and total response size.
+
+        Results of IMMUTABLE_METHODS are stored only when their block is at or below the last irreversible block
+        seen in a get_dynamic_global_properties response. Results of TTL_METHODS are stored for `ttl` seconds.
+
+        Results are stored serialized and every hit is decoded anew, so callers may modify what they get. Keys and
+        the last irreversible block do not include the url: use one cache per chain, never one shared by e.g. a
+        mainnet and a testnet client.
+
+        :param int max_entries: max number of cached results
+        :param int max_bytes: max total size of cached responses
+        :param float ttl: lifetime of TTL_METHODS results in seconds
+    """
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024, ttl=3.0):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.last_irreversible_block_num = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(method, args):
+        return method, json.dumps(args, sort_keys=True)
+
+    @staticmethod
+    def cacheable(method):
+        return method in IMMUTABLE_METHODS or method in TTL_METHODS
+
+    def pending_irreversible(self, method, args, result):
+        """ :return: True when the result belongs to a block that is not known to be irreversible yet """
+        if method not in IMMUTABLE_METHODS or result is None:
+            return False
+        block_num = IMMUTABLE_METHODS[method](args, result)
+        return block_num is not None and block_num > self.last_irreversible_block_num
+
+    def get(self, method, args):
+        """ :return: tuple of (found, result) """
+        key = self._key(method, args)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[2] is None or entry[2] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, json.loads(entry[0])
+
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def put(self, method, args, result, size=None):
+        """ :return: True when the result was stored """
+        if method == "get_dynamic_global_properties" and isinstance(result, dict):
+            self.last_irreversible_block_num = max(self.last_irreversible_block_num,
+                                                   result.get("last_irreversible_block_num", 0))
+
+        if method in IMMUTABLE_METHODS:
+            block_num = IMMUTABLE_METHODS[method](args, result)
+            if result is None or block_num is None or block_num > self.last_irreversible_block_num:
+                return False
+            expires = None
+        elif method in TTL_METHODS:
+            expires = time.monotonic() + self._ttl
+        else:
+            return False
+
+        data = json.dumps(result, separators=(",", ":"))
+        if size is None:
+            size = len(data)
+        if size > self._max_bytes:
+            return False
+
+        key = self._key(method, args)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (data, size, expires)
+            self._bytes += size
+
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+        return True
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
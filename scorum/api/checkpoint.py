@@ -0,0 +1,22 @@
+import json
+import os
+
+
+class Checkpoint:
+    """ (start_author, start_permlink) of the last crawled post, saved atomically to a JSON file. """
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return data["start_author"], data["start_permlink"]
+        except FileNotFoundError:
+            return None, None
+
+    def save(self, author, permlink):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"start_author": author, "start_permlink": permlink}, f)
+        os.replace(tmp, self.path)
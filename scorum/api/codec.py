@@ -0,0 +1,58 @@
+import json
+
+from scorum.utils.logger import get_logger
+
+log = get_logger("codec")
+
+
+class Codec:
+    """ JSON encoder/decoder pair: `dumps` returns bytes, `loads` accepts bytes or str. """
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return "Codec(%s)" % self.name
+
+
+def _json_codec():
+    return Codec("json", lambda obj: json.dumps(obj).encode("utf-8"), json.loads)
+
+
+def _orjson_codec():
+    import orjson
+    return Codec("orjson", orjson.dumps, orjson.loads)
+
+
+def _ujson_codec():
+    import ujson
+    return Codec("ujson", lambda obj: ujson.dumps(obj).encode("utf-8"), ujson.loads)
+
+
+def _rapidjson_codec():
+    import rapidjson
+    return Codec("rapidjson", lambda obj: rapidjson.dumps(obj).encode("utf-8"), rapidjson.loads)
+
+
+CODECS = {
+    "orjson": _orjson_codec,
+    "ujson": _ujson_codec,
+    "rapidjson": _rapidjson_codec,
+    "json": _json_codec,
+}
+
+
+def get_codec(name=None):
+    """ :param str name: one of CODECS, the fastest installed codec when omitted """
+    if name is not None:
+        return CODECS[name]()
+
+    for name, factory in CODECS.items():
+        try:
+            return factory()
+        except ImportError:
+            log.debug("%s is not installed", name)
+
+
+default_codec = get_codec()
@@ -0,0 +1,52 @@
+import zlib
+
+ACCEPT_ENCODING = "gzip, deflate"
+
+# zlib window bits accepting both zlib (deflate) and gzip headers
+_AUTO_HEADER = 32 + zlib.MAX_WBITS
+
+
+class _Identity:
+    def decompress(self, data):
+        return data
+
+    def flush(self):
+        return b""
+
+
+class _Zlib:
+    def __init__(self, encoding):
+        self._encoding = encoding
+        self._d = zlib.decompressobj(_AUTO_HEADER)
+
+    def decompress(self, data):
+        try:
+            return self._d.decompress(data)
+        except zlib.error as e:
+            raise ValueError("corrupt %s response: %s" % (self._encoding, e))
+
+    def flush(self):
+        try:
+            return self._d.flush()
+        except zlib.error as e:
+            raise ValueError("corrupt %s response: %s" % (self._encoding, e))
+
+
+def decompressor(encoding):
+    """ :return: object whose decompress(chunk) / flush() undo a Content-Encoding chunk by chunk
+
+        Both raise ValueError on corrupt data, as does decompressor() for encodings other than gzip, deflate and
+        identity.
+    """
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return _Identity()
+    if encoding in ("gzip", "x-gzip", "deflate"):
+        return _Zlib(encoding)
+    raise ValueError("unsupported Content-Encoding: %s" % encoding)
+
+
+def decompress(data, encoding):
+    """ Undo the Content-Encoding of a whole response body. """
+    d = decompressor(encoding)
+    return d.decompress(data) + d.flush()
@@ -0,0 +1,132 @@
+import asyncio
+import concurrent.futures
+import threading
+from collections import deque
+
+from scorum.api.methods import methods
+
+# every registered method is a read and can safely be sent twice
+READ_METHODS = frozenset(methods)
+
+
+def _succeeded(result):
+    return result is not None
+
+
+class Hedging:
+    """ Hedged requests policy: when a read call is slower than the `percentile` of observed latencies the same
+        request is sent to a second endpoint and the first successful answer wins.
+
+        :param float percentile: percentile of observed latencies after which the hedge is sent
+        :param float initial_delay: hedge delay used until `min_samples` latencies are observed
+        :param int window: number of most recent latencies the percentile is computed over
+        :param set methods: methods that may be hedged, READ_METHODS by default
+    """
+    def __init__(self, percentile=95, initial_delay=1.0, min_samples=20, window=200, methods=None, workers=8):
+        self._percentile = percentile
+        self._initial_delay = initial_delay
+        self._min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._methods = READ_METHODS if methods is None else frozenset(methods)
+        self._workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def applies(self, method):
+        return method in self._methods
+
+    def record(self, latency):
+        self._latencies.append(latency)
+
+    def delay(self):
+        latencies = sorted(self._latencies)
+        if len(latencies) < self._min_samples:
+            return self._initial_delay
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self._percentile / 100.0))]
+
+    def _submit(self, fn):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self._workers, "hedge")
+        return self._executor.submit(fn)
+
+    def run(self, primary, hedge, ok=_succeeded):
+        """ Run the primary callable and, if it is slow, the hedge callable on worker threads.
+
+            A call raising counts as failed like one whose result is not `ok`; the error is only raised when both
+            calls raised. The losing call can not be interrupted and is left to finish in the background.
+        """
+        futures = [self._submit(primary)]
+        done, _ = concurrent.futures.wait(futures, timeout=self.delay())
+        if done:
+            return futures[0].result()
+
+        self.hedged += 1
+        futures.append(self._submit(hedge))
+        results, error = [], None
+
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                error = e
+                continue
+
+            if ok(result):
+                if future is futures[1]:
+                    self.hedge_wins += 1
+                for f in futures:
+                    f.cancel()
+                return result
+            results.append(result)
+
+        if not results:
+            raise error
+        return results[-1]
+
+    async def arun(self, primary, hedge, ok=_succeeded):
+        """ Await the primary coroutine and, if it is slow, the hedge coroutine; the loser is cancelled.
+
+            Errors are handled like in run().
+        """
+        tasks = [asyncio.ensure_future(primary)]
+        hedge_task = None
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.delay())
+            if done:
+                return tasks[0].result()
+
+            self.hedged += 1
+            hedge_task = asyncio.ensure_future(hedge)
+            tasks.append(hedge_task)
+            results, error = [], None
+
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    result = await next_done
+                except Exception as e:
+                    error = e
+                    continue
+
+                if ok(result):
+                    if hedge_task.done() and not tasks[0].done():
+                        self.hedge_wins += 1
+                    return result
+                results.append(result)
+
+            if not results:
+                raise error
+            return results[-1]
+        finally:
+            if hedge_task is None:
+                hedge.close()
+            for task in tasks:
+                task.cancel()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
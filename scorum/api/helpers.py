@@ -1,5 +1,16 @@
-from scorum.api import api
+from scorum.api import api, call
+from scorum.api import async_helpers
+from scorum.api.checkpoint import Checkpoint
+from scorum.api.methods import DISCUSSIONS_METHODS
+from scorum.api.retry import default_policy
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import asyncio
+import json
 import logging
+import os
+import time
 
 
 def scan_accounts(url, callback, limit=100):
@@ -21,6 +32,15 @@ def scan_accounts(url, callback, limit=100):
         start_author = accounts[-1]
 
 
+def scan_accounts_concurrently(url, callback, limit=100, shards=4, workers=4):
+    """ Blocking variant of async_helpers.ascan_accounts, the callback runs on the scanning thread. """
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(async_helpers.ascan_accounts(url, callback, limit, shards, workers))
+    finally:
+        loop.close()
+
+
 def get_all_account_names(url):
     accounts = []
     stop = False
@@ -42,11 +62,109 @@ def get_all_account_names(url):
     return accounts
 
 
-def get_all_account_objects(url):
+def chunks(iterable, size):
+    it = iter(iterable)
+    chunk = list(islice(it, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(it, size))
+
+
+def _lookup_chunk(url, names, retries):
+    for attempt in range(retries):
+        if attempt > 0:
+            # the node may be overloaded, back off like Request does between its own retries
+            delay = default_policy.delay(attempt)
+            if delay is None:
+                break
+            time.sleep(delay)
+
+        r = api.lookup_account_names(url, names)
+        if r is not None:
+            return r
+        logging.warning("lookup of %d accounts starting with %s failed", len(names), names[0])
+
+    raise ConnectionError("Failed to look up accounts starting with %s from: %s" % (names[0], url))
+
+
+def lookup_accounts_bulk(url, names, chunk_size=100, workers=4, retries=3):
+    """ Yield account objects for any iterable of names, in input order.
+
+        Names are looked up in chunks of `chunk_size` on `workers` threads with at most `2 * workers` chunks in
+        flight; a failed chunk is retried alone up to `retries` times, with the default_policy backoff in between.
+    """
+    names = chunks(names, chunk_size)
+
+    with ThreadPoolExecutor(workers) as executor:
+        pending = deque(executor.submit(_lookup_chunk, url, chunk, retries) for chunk in islice(names, 2 * workers))
+
+        while pending:
+            objects = pending.popleft().result()
+            for chunk in islice(names, 1):
+                pending.append(executor.submit(_lookup_chunk, url, chunk, retries))
+            for obj in objects:
+                yield obj
+
+
+def scan_ops_history(url, start=0, stop=None, window=100, workers=4, type=0, predicate=None):
+    """ Yield (seq, op) pairs of the operation history in [start, stop), in sequence order.
+
+        The range is split into windows of `window` ops fetched on `workers` threads with at most `2 * workers`
+        windows in flight. `type` is the node side get_ops_history filter and `predicate(op)` an additional client
+        side one. `stop` defaults to the newest operation at the time of the call.
+    """
+    if stop is None:
+        r = api.get_ops_history(url, async_helpers.LAST_OP, 1, type)
+        if r is None:
+            raise ConnectionError("Failed to get the last operation from: %s" % url)
+        stop = max(seq for seq, _ in r) + 1 if r else start
+
+    def fetch(lower, upper):
+        r = api.get_ops_history(url, upper - 1, upper - lower, type)
+        if r is None:
+            raise ConnectionError("Failed to get operations [%d, %d) from: %s" % (lower, upper, url))
+        return async_helpers.ops_in_window(r, lower, upper, predicate)
+
+    windows = iter(async_helpers.op_windows(start, stop, window))
+
+    with ThreadPoolExecutor(workers) as executor:
+        pending = deque(executor.submit(fetch, *w) for w in islice(windows, 2 * workers))
+
+        while pending:
+            ops = pending.popleft().result()
+            for w in islice(windows, 1):
+                pending.append(executor.submit(fetch, *w))
+            for op in ops:
+                yield op
+
+
+def scan_ops_history_by_time(url, from_time, to_time, limit=100, predicate=None):
+    """ Yield (seq, op) pairs of operations applied between `from_time` and `to_time`, newest first.
+
+        Unlike scan_ops_history the sequence range is not known up front, so pages are fetched one after another.
+    """
+    from_op = async_helpers.LAST_OP
+
+    while True:
+        r = api.get_ops_history_by_time(url, from_time, to_time, from_op, limit)
+        if r is None:
+            raise ConnectionError("Failed to get operations from %s to %s from: %s" % (from_time, to_time, url))
+
+        for op in async_helpers.ops_in_window(r, 0, from_op + 1, predicate)[::-1]:
+            yield op
+
+        if len(r) < limit:
+            return
+        from_op = min(seq for seq, _ in r) - 1
+        if from_op < 0:
+            return
+
+
+def get_all_account_objects(url, chunk_size=100, workers=4):
     all_account_names = get_all_account_names(url)
-    r = api.lookup_account_names(url, all_account_names)
+    r = list(lookup_accounts_bulk(url, all_account_names, chunk_size, workers))
 
-    assert len(r) == api.get_account_count(url)
+    assert len(r) == len(all_account_names)
 
     return r
 
@@ -78,3 +196,69 @@ def get_all_posts(url, start_author=None, start_permlink=None):
         query["start_permlink"] = posts[-1]["permlink"]
 
     return posts
+
+
+def iter_post_pages(url, method="get_discussions_by_created", query=None, checkpoint=None, limit=100):
+    """ Yield pages (lists) of new posts from one of DISCUSSIONS_METHODS.
+
+        With a checkpoint path the position after every consumed page is saved and a later crawl with the same
+        checkpoint resumes right after it, so after a crash a page may be yielded twice but nothing is skipped.
+    """
+    if method not in DISCUSSIONS_METHODS:
+        raise ValueError("%s is not one of %s" % (method, DISCUSSIONS_METHODS))
+
+    query = dict(query or {})
+    query["limit"] = limit
+    checkpoint = Checkpoint(checkpoint) if checkpoint is not None else None
+    skip_first = False
+
+    if checkpoint is not None:
+        author, permlink = checkpoint.load()
+        if author is not None:
+            query["start_author"], query["start_permlink"] = author, permlink
+            skip_first = True
+
+    while True:
+        r = call(url, "tags_api", method, [query])
+        if r is None:
+            raise ConnectionError("Failed to get %s %s from: %s" % (method, query, url))
+
+        posts = r[1:] if skip_first else r
+        if not posts:
+            return
+
+        yield posts
+
+        query["start_author"] = posts[-1]["author"]
+        query["start_permlink"] = posts[-1]["permlink"]
+        if checkpoint is not None:
+            checkpoint.save(query["start_author"], query["start_permlink"])
+
+        if len(r) < limit:
+            return
+        skip_first = True
+
+
+def iter_posts(url, method="get_discussions_by_created", query=None, checkpoint=None, limit=100):
+    for posts in iter_post_pages(url, method, query, checkpoint, limit):
+        for post in posts:
+            yield post
+
+
+def crawl_posts_to_jsonl(url, path, method="get_discussions_by_created", query=None, checkpoint=None, limit=100):
+    """ Append posts to a JSON lines file, resuming from `checkpoint` (defaults to `path` + ".checkpoint").
+
+        :return: number of posts written
+    """
+    checkpoint = checkpoint or path + ".checkpoint"
+    written = 0
+
+    with open(path, "a") as f:
+        for posts in iter_post_pages(url, method, query, checkpoint, limit):
+            f.writelines(json.dumps(post) + "\n" for post in posts)
+            # the page must be on disk before iter_post_pages saves the checkpoint past it
+            f.flush()
+            os.fsync(f.fileno())
+            written += len(posts)
+
+    return written
@@ -0,0 +1,133 @@
+import re
+
+from scorum.api.codec import default_codec
+
+STRUCTURAL = re.compile(rb'[\[\]{}",:]')
+STRING_END = re.compile(rb'["\\]')
+WHITESPACE = b" \t\r\n"
+
+HEAD, ARRAY, TAIL = range(3)
+
+
+class ResultStream:
+    """ Incremental parser of a JSON-RPC response whose `result` is an array.
+
+        Response bytes are fed as they arrive and every array element is decoded as soon as its closing byte is
+        seen, so only the element being received is buffered. A response whose result is not an array (or an
+        error response) is buffered whole and handled by close().
+    """
+    def __init__(self, codec=None):
+        self._codec = codec or default_codec
+        self._buf = bytearray()
+        self._pos = 0
+        self._state = HEAD
+        self._depth = 0
+        self._in_string = False
+        self._string_start = None
+        self._last_string = None
+        self._start = None
+
+    def feed(self, chunk):
+        """ :return: list of array elements completed by this chunk """
+        if self._state == TAIL:
+            return []
+
+        self._buf += chunk
+        elements = self._scan()
+
+        if self._state == ARRAY:
+            # keep only the element being received
+            keep = self._start if self._start is not None else self._pos
+            del self._buf[:keep]
+            self._pos -= keep
+            if self._start is not None:
+                self._start = 0
+        elif self._state == TAIL:
+            self._buf = bytearray()
+
+        return elements
+
+    def close(self):
+        """ :return: list of elements of a result that was not streamed, raises ValueError on error responses """
+        if self._state == ARRAY:
+            raise ValueError("response ended inside the result array")
+        if self._state == TAIL:
+            return []
+
+        response = self._codec.loads(bytes(self._buf))
+        if "error" in response:
+            raise ValueError("error response: %s" % response["error"])
+
+        result = response.get("result")
+        if result is None:
+            return []
+        return result if isinstance(result, list) else [result]
+
+    def _scan(self):
+        buf = self._buf
+        elements = []
+
+        while True:
+            if self._in_string:
+                m = STRING_END.search(buf, self._pos)
+                if m is None:
+                    self._pos = len(buf)
+                    return elements
+                if m.group() == b"\\":
+                    if m.end() >= len(buf):
+                        self._pos = m.start()
+                        return elements
+                    self._pos = m.end() + 1
+                    continue
+                self._in_string = False
+                self._pos = m.end()
+                self._last_string = (self._string_start, self._pos)
+                continue
+
+            m = STRUCTURAL.search(buf, self._pos)
+            if m is None:
+                self._pos = len(buf)
+                return elements
+
+            char = m.group()
+            self._pos = m.end()
+
+            if char == b'"':
+                self._in_string = True
+                self._string_start = m.start()
+            elif char in b"[{":
+                self._depth += 1
+            elif char in b"]}":
+                self._depth -= 1
+                if self._state == ARRAY and self._depth == 1:
+                    self._emit(elements, m.start())
+                    self._state = TAIL
+                    return elements
+            elif char == b",":
+                if self._state == ARRAY and self._depth == 2:
+                    self._emit(elements, m.start())
+                    self._start = self._pos
+            elif char == b":" and self._state == HEAD and self._depth == 1:
+                start, end = self._last_string or (0, 0)
+                if buf[start:end] != b'"result"':
+                    continue
+
+                pos = self._pos
+                while pos < len(buf) and buf[pos] in WHITESPACE:
+                    pos += 1
+
+                if pos == len(buf):
+                    # the value has not arrived yet, look at this colon again on the next chunk
+                    self._pos = m.start()
+                    return elements
+
+                if buf[pos] == ord("["):
+                    self._state = ARRAY
+                    self._depth += 1
+                    self._pos = self._start = pos + 1
+
+    def _emit(self, elements, end):
+        element = bytes(self._buf[self._start:end]).strip()
+        if element:
+            elements.append(self._codec.loads(element))
+        self._start = None
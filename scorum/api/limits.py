@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """ Token bucket rate limiter usable from threads (acquire) and coroutines (aacquire).
+
+        :param float rate: tokens added per second
+        :param int burst: bucket capacity, defaults to one second worth of tokens
+    """
+    def __init__(self, rate, burst=None):
+        self._rate = float(rate)
+        self._burst = float(burst if burst is not None else max(1, rate))
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """ :return: 0 when a token was taken, otherwise seconds until one is available """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self._rate
+
+    def acquire(self):
+        wait = self._take()
+        while wait:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def aacquire(self):
+        wait = self._take()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take()
+
+
+class AdaptiveLimit:
+    """ AIMD concurrency limit for coroutines.
+
+        The limit grows by about one per round trip and is multiplied by `backoff` on errors, timeouts and
+        throttling, or when the recent latency of a method stays above `tolerance` times its long-term average.
+        Latency is smoothed per key, usually the method, so jitter and methods of different cost are no
+        congestion signal.
+
+        :param int initial: starting number of concurrent requests
+        :param int min_limit: lower bound of the limit
+        :param int max_limit: upper bound of the limit
+    """
+    # weights of a new latency sample in the recent and the long-term average
+    RECENT = 0.1
+    BASELINE = 0.01
+
+    def __init__(self, initial=16, min_limit=1, max_limit=256, backoff=0.7, tolerance=2.0):
+        self.limit = float(initial)
+        self.inflight = 0
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._backoff = backoff
+        self._tolerance = tolerance
+        self._latency = dict()
+        self._waiters = deque()
+
+    async def acquire(self):
+        while self.inflight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # woken up but cancelled before resuming, pass the free slot on
+                    self._wake()
+                raise
+        self.inflight += 1
+
+    def release(self, latency=None, ok=True, key=None):
+        """ :param bool ok: True for a response, False for a failure, None when the request says nothing about
+            the node's load, e.g. a stream consumed at the caller's pace
+        """
+        self.inflight -= 1
+        if ok is not None:
+            self._update(latency, ok, key)
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.inflight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _congested(self, latency, key):
+        averages = self._latency.get(key)
+        if averages is None:
+            self._latency[key] = [latency, latency]
+            return False
+
+        averages[0] += self.RECENT * (latency - averages[0])
+        averages[1] += self.BASELINE * (latency - averages[1])
+        if averages[0] <= self._tolerance * averages[1]:
+            return False
+
+        # start over from the baseline, so one slowdown backs off once and a lasting one again
+        averages[0] = averages[1]
+        return True
+
+    def _update(self, latency, ok, key):
+        if ok and (latency is None or not self._congested(latency, key)):
+            self.limit = min(self._max_limit, self.limit + 1.0 / self.limit)
+        else:
+            self.limit = max(self._min_limit, self.limit * self._backoff)
@@ -30,6 +30,8 @@ methods = {
 
     "get_chain_capital": "chain_api"}
 
+DISCUSSIONS_METHODS = sorted(m for m in methods if m.startswith("get_discussions_by_"))
+
 
 def get_api_name(method):
     try:
@@ -39,7 +41,7 @@ def get_api_name(method):
         return None
 
 
-def to_payload(method, api="", args=[]):
+def to_payload(method, api="", args=[], id="0"):
     if api is "" or api is None:
         api = get_api_name(method)
         if api is "" or api is None:
@@ -47,10 +49,40 @@ def to_payload(method, api="", args=[]):
 
     data = dict()
 
-    data["id"] = "0"
+    data["id"] = id
     data["jsonrpc"] = "2.0"
     data["method"] = "call"
 
     data["params"] = [api, method, args]
 
     return data
+
+
+# statuses of a node refusing a batch as a whole, e.g. for its size
+BATCH_REJECTED_STATUSES = (400, 413)
+
+
+def to_batch_payload(calls):
+    return [to_payload(method, api, args, str(i)) for i, (api, method, args) in enumerate(calls)]
+
+
+def from_batch_response(response, count):
+    results = [None] * count
+
+    for item in response:
+        try:
+            i = int(item["id"])
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        if 0 <= i < count and "result" in item:
+            results[i] = item["result"]
+
+    return results
+
+
+def batch_rejected(status, response):
+    """ :return: True when the node refused a batch as a whole, which a smaller batch may avoid """
+    if status in BATCH_REJECTED_STATUSES:
+        return True
+    return status == 200 and isinstance(response, dict) and "error" in response
@@ -0,0 +1,114 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def describe(payload):
+    """ :return: tuple of (api, method) of a call payload, batches are reported as ("batch", "call") """
+    if isinstance(payload, list):
+        return "batch", "call"
+    api, method, _ = payload["params"]
+    return api, method
+
+
+class _Series:
+    def __init__(self, buckets):
+        self.buckets = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+        self.errors = 0
+
+
+class Metrics:
+    """ Thread-safe per (api, method, endpoint) RPC statistics: latency histogram, payload and response bytes,
+        retries and errors. Every HTTP exchange is one observation, so retried calls are observed once per attempt.
+    """
+    def __init__(self, buckets=BUCKETS):
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = dict()
+
+    def observe(self, api, method, endpoint, latency, request_bytes=0, response_bytes=0, retry=False, error=False):
+        with self._lock:
+            key = (api, method, endpoint)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self._buckets)
+
+            series.buckets[bisect.bisect_left(self._buckets, latency)] += 1
+            series.count += 1
+            series.sum += latency
+            series.request_bytes += request_bytes
+            series.response_bytes += response_bytes
+            series.retries += int(retry)
+            series.errors += int(error)
+
+    def snapshot(self):
+        """ :return: list of dicts, one per (api, method, endpoint), sorted by total time spent """
+        with self._lock:
+            result = [{"api": api, "method": method, "endpoint": endpoint,
+                       "count": s.count, "sum": s.sum, "avg": s.sum / s.count if s.count else 0.0,
+                       "buckets": list(zip(self._buckets + (float("inf"),), s.buckets)),
+                       "request_bytes": s.request_bytes, "response_bytes": s.response_bytes,
+                       "retries": s.retries, "errors": s.errors}
+                      for (api, method, endpoint), s in self._series.items()]
+        return sorted(result, key=lambda r: r["sum"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def to_prometheus(self, prefix="scorum_rpc"):
+        lines = ["# TYPE {0}_duration_seconds histogram".format(prefix)]
+        counters = ("request_bytes", "response_bytes", "retries", "errors")
+        snapshot = self.snapshot()
+
+        for s in snapshot:
+            labels = 'api="{api}",method="{method}",endpoint="{endpoint}"'.format(**s)
+            total = 0
+            for bound, count in s["buckets"]:
+                total += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append('{0}_duration_seconds_bucket{{{1},le="{2}"}} {3}'.format(prefix, labels, le, total))
+            lines.append("{0}_duration_seconds_sum{{{1}}} {2}".format(prefix, labels, s["sum"]))
+            lines.append("{0}_duration_seconds_count{{{1}}} {2}".format(prefix, labels, s["count"]))
+
+        for counter in counters:
+            lines.append("# TYPE {0}_{1}_total counter".format(prefix, counter))
+            for s in snapshot:
+                labels = 'api="{api}",method="{method}",endpoint="{endpoint}"'.format(**s)
+                lines.append("{0}_{1}_total{{{2}}} {3}".format(prefix, counter, labels, s[counter]))
+
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9100, host="127.0.0.1"):
+        """ Serve to_prometheus() over HTTP from a daemon thread.
+
+            :return: the running server, call shutdown() on it to stop
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+default_metrics = Metrics()
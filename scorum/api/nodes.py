@@ -0,0 +1,101 @@
+import threading
+import time
+
+
+class Node:
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def score(self):
+        return (self.latency or 0.0) * (1.0 + 10.0 * self.error_rate)
+
+    def __repr__(self):
+        return "Node(%s, latency=%s, error_rate=%.2f)" % (self.url, self.latency, self.error_rate)
+
+
+class NodeSet:
+    """ Set of equivalent endpoints that can be passed everywhere a url is expected.
+
+        Each request goes to the available node with the best EWMA latency weighted by EWMA error rate; nodes
+        that were never measured are tried first. After `max_failures` consecutive failures a node is ejected for
+        `cooldown` seconds and then probed again with live traffic.
+
+        :param list urls: node endpoints
+        :param float alpha: EWMA smoothing factor
+    """
+    def __init__(self, urls, alpha=0.2, max_failures=3, cooldown=30.0):
+        if not urls:
+            raise ValueError("NodeSet requires at least one url")
+
+        self.nodes = [Node(url) for url in urls]
+        self._alpha = alpha
+        self._max_failures = max_failures
+        self._cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def _node(self, url):
+        for node in self.nodes:
+            if node.url == url:
+                return node
+        raise KeyError(url)
+
+    def select(self, exclude=()):
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = [n for n in self.nodes if n.url not in exclude] or self.nodes
+            available = [n for n in candidates if n.ejected_until <= now]
+
+            if not available:
+                # everything is ejected, probe the node that comes back first
+                return min(candidates, key=lambda n: n.ejected_until).url
+
+            for node in available:
+                if node.failures >= self._max_failures:
+                    # cool-down is over, send one probe and keep the node out until it answers
+                    node.ejected_until = now + self._cooldown
+                    return node.url
+
+            unmeasured = [n for n in available if n.latency is None]
+            if unmeasured:
+                return unmeasured[0].url
+
+            return min(available, key=Node.score).url
+
+    def report(self, url, latency, ok):
+        with self._lock:
+            node = self._node(url)
+            node.error_rate += self._alpha * ((0.0 if ok else 1.0) - node.error_rate)
+
+            if ok:
+                node.failures = 0
+                node.ejected_until = 0.0
+                if latency is not None:
+                    node.latency = latency if node.latency is None else \
+                        node.latency + self._alpha * (latency - node.latency)
+                return
+
+            node.failures += 1
+            if node.failures >= self._max_failures:
+                node.ejected_until = time.monotonic() + self._cooldown
+
+    def available(self):
+        now = time.monotonic()
+        with self._lock:
+            return [n.url for n in self.nodes if n.ejected_until <= now]
+
+    def __repr__(self):
+        return "NodeSet(%s)" % ", ".join(n.url for n in self.nodes)
+
+
+def select_endpoint(url, exclude=()):
+    return url.select(exclude) if isinstance(url, NodeSet) else url
+
+
+def report(url, endpoint, latency, ok):
+    if isinstance(url, NodeSet):
+        url.report(endpoint, latency, ok)
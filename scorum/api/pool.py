@@ -0,0 +1,151 @@
+import http.client
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+RECONNECT_ERRORS = (ConnectionResetError, BrokenPipeError, http.client.CannotSendRequest, http.client.BadStatusLine)
+
+
+class ConnectionPool:
+    """ Thread-safe pool of keep-alive HTTP(S) connections, one queue per host.
+
+        :param int maxsize: max number of idle connections kept per host
+        :param float idle_timeout: idle connections older than this (seconds) are closed instead of reused
+        :param float timeout: socket timeout passed to new connections
+    """
+    def __init__(self, maxsize=10, idle_timeout=30, timeout=None):
+        self._maxsize = maxsize
+        self._idle_timeout = idle_timeout
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._idle = dict()
+
+    @staticmethod
+    def _key(url_object):
+        return url_object.scheme or "http", url_object.netloc
+
+    def _target(self, url):
+        """ :return: tuple of (pool key, request path) """
+        url_object = urlparse(url)
+        return self._key(url_object), url_object.path or "/"
+
+    def _connect(self, key):
+        scheme, netloc = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self._timeout)
+        return http.client.HTTPConnection(netloc, timeout=self._timeout)
+
+    def _get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            queue = self._idle.get(key)
+            while queue:
+                conn, last_used = queue.pop()
+                if now - last_used < self._idle_timeout:
+                    return conn, True
+                conn.close()
+        return self._connect(key), False
+
+    def _put(self, key, conn):
+        with self._lock:
+            queue = self._idle.setdefault(key, deque())
+            if len(queue) < self._maxsize:
+                queue.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def _open(self, url, body, headers, timeout):
+        key, path = self._target(url)
+
+        while True:
+            conn, reused = self._get(key)
+            try:
+                if timeout is not None:
+                    if conn.sock is None:
+                        conn.timeout = timeout[0]
+                        conn.connect()
+                    conn.sock.settimeout(timeout[1])
+
+                conn.request("POST", path, body, headers)
+                return key, conn, conn.getresponse()
+            except RECONNECT_ERRORS:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+
+    def _release(self, key, conn, res):
+        if res.will_close or not res.isclosed():
+            conn.close()
+        else:
+            self._put(key, conn)
+
+    def request(self, url, body, headers, timeout=None):
+        """ POST body to url over a pooled connection.
+
+            A reused connection that was dropped by the server is transparently replaced by a fresh one.
+
+            :param tuple timeout: optional (connect, read) socket timeouts overriding the pool timeout
+
+            :return: tuple of (http.client.HTTPResponse, bytes)
+        """
+        key, conn, res = self._open(url, body, headers, timeout)
+        try:
+            data = res.read()
+        except BaseException:
+            conn.close()
+            raise
+
+        self._release(key, conn, res)
+        return res, data
+
+    @contextmanager
+    def stream(self, url, body, headers, timeout=None):
+        """ Like request() but yields the unread http.client.HTTPResponse; the connection goes back to the pool
+            only when the response was read to the end.
+        """
+        key, conn, res = self._open(url, body, headers, timeout)
+        try:
+            yield res
+        except BaseException:
+            conn.close()
+            raise
+
+        self._release(key, conn, res)
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            for queue in self._idle.values():
+                alive = [(c, t) for c, t in queue if now - t < self._idle_timeout]
+                for conn, last_used in queue:
+                    if now - last_used >= self._idle_timeout:
+                        conn.close()
+                queue.clear()
+                queue.extend(alive)
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def size(self, url=None):
+        with self._lock:
+            if url is None:
+                return sum(len(q) for q in self._idle.values())
+            return len(self._idle.get(self._target(url)[0], ()))
+
+    def close(self):
+        with self._lock:
+            for queue in self._idle.values():
+                for conn, _ in queue:
+                    conn.close()
+            self._idle.clear()
+
+
+default_pool = ConnectionPool()
@@ -0,0 +1,200 @@
+import json
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from scorum.api.transport import BufferedResponse, get_transport
+
+# length of the zlib compressed record that follows
+LENGTH = struct.Struct("<I")
+# seconds since the log was opened, latency, status, then lengths of meta, request body and response body
+HEADER = struct.Struct("<ddHIII")
+
+
+def request_key(body):
+    """ :return: what a request body is matched by, the (api, method, args) of each call regardless of request ids
+        and of the JSON codec that encoded it
+    """
+    try:
+        payload = json.loads(bytes(body))
+    except ValueError:
+        return bytes(body)
+
+    items = payload if isinstance(payload, list) else [payload]
+    calls = [[item.get("method"), item.get("params")] if isinstance(item, dict) else item for item in items]
+    return isinstance(payload, list), json.dumps(calls, sort_keys=True)
+
+
+class Exchange:
+    def __init__(self, offset, latency, status, endpoint, reason, encoding, body, data):
+        self.offset = offset
+        self.latency = latency
+        self.status = status
+        self.endpoint = endpoint
+        self.reason = reason
+        self.encoding = encoding
+        self.body = body
+        self.data = data
+
+    def response(self):
+        return BufferedResponse(self.status, self.reason, self.encoding, self.data)
+
+
+class TrafficLog:
+    """ Append-only file of request/response exchanges, one zlib compressed record each.
+
+        Responses are stored as received, still content-encoded, so a replay exercises the same parse path. A
+        record cut short by a crash ends the log when it is read.
+    """
+    def __init__(self, path, level=1):
+        self.path = path
+        self._level = level
+        self._lock = threading.Lock()
+        self._file = None
+        self._start = None
+
+    def append(self, endpoint, body, status, reason, encoding, data, latency):
+        meta = json.dumps([endpoint, reason, encoding]).encode("utf-8")
+
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+                self._start = time.time()
+
+            record = HEADER.pack(time.time() - self._start, latency, status, len(meta), len(body), len(data))
+            record = zlib.compress(record + meta + body + data, self._level)
+            self._file.write(LENGTH.pack(len(record)) + record)
+            self._file.flush()
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            while True:
+                length = f.read(LENGTH.size)
+                if len(length) < LENGTH.size:
+                    return
+                record = f.read(LENGTH.unpack(length)[0])
+                try:
+                    record = zlib.decompress(record)
+                except zlib.error:
+                    return
+
+                offset, latency, status, meta_len, body_len, data_len = HEADER.unpack_from(record)
+                pos = HEADER.size
+                endpoint, reason, encoding = json.loads(record[pos:pos + meta_len].decode("utf-8"))
+                pos += meta_len
+                body = record[pos:pos + body_len]
+                data = record[pos + body_len:pos + body_len + data_len]
+                yield Exchange(offset, latency, status, endpoint, reason, encoding, body, data)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class Replay:
+    """ Answers requests from a TrafficLog without a network.
+
+        Requests are matched by request_key, so a log recorded with one codec or client version replays with
+        another. Identical requests get their recorded responses in recorded order, and the last one again once
+        they run out, so polling loops keep working. Responses are returned as recorded, request ids included. A
+        request that was never recorded raises ConnectionError, which the clients treat like a failed connection.
+
+        Only the latency of each exchange is reproduced. The gaps between requests, kept as Exchange.offset, are
+        not: requests are answered at whatever pace the replaying client sends them.
+
+        :param float speed: None answers at once, 1.0 waits the recorded latency, 10.0 a tenth of it
+    """
+    def __init__(self, path, speed=None):
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._exchanges = defaultdict(deque)
+        for exchange in TrafficLog(path):
+            self._exchanges[request_key(exchange.body)].append(exchange)
+
+    def __len__(self):
+        return sum(len(q) for q in self._exchanges.values())
+
+    def next(self, body):
+        with self._lock:
+            queue = self._exchanges.get(request_key(body))
+            if not queue:
+                raise ConnectionError("no recorded response to: %s" % bytes(body)[:200])
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def delay(self, exchange):
+        return exchange.latency / self.speed if self.speed else 0
+
+
+class _Tee:
+    """ Response wrapper keeping a copy of everything read through it. """
+    def __init__(self, res):
+        self._res = res
+        self.chunks = []
+
+    def read(self, amt=None):
+        data = self._res.read() if amt is None else self._res.read(amt)
+        self.chunks.append(data)
+        return data
+
+    def read1(self, amt=-1):
+        data = self._res.read1(amt)
+        self.chunks.append(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._res, name)
+
+
+class RecordingPool:
+    """ ConnectionPool wrapper appending every exchange to a TrafficLog, use as Request(pool=RecordingPool(...)). """
+    def __init__(self, path, pool=None):
+        self.log = TrafficLog(path)
+        self._pool = pool
+
+    def _transport(self, url):
+        return self._pool if self._pool is not None else get_transport(url)
+
+    def request(self, url, body, headers, timeout=None):
+        ts = time.time()
+        res, data = self._transport(url).request(url, body, headers, timeout)
+        self.log.append(url, body, res.status, res.reason, res.getheader("Content-Encoding"), data, time.time() - ts)
+        return res, data
+
+    @contextmanager
+    def stream(self, url, body, headers, timeout=None):
+        ts = time.time()
+        with self._transport(url).stream(url, body, headers, timeout) as res:
+            tee = _Tee(res)
+            yield tee
+        self.log.append(url, body, res.status, res.reason, res.getheader("Content-Encoding"), b"".join(tee.chunks),
+                        time.time() - ts)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+        self.log.close()
+
+
+class ReplayPool:
+    """ ConnectionPool stand-in answering from a recorded TrafficLog, use as Request(pool=ReplayPool(...)). """
+    def __init__(self, path, speed=None):
+        self.replay = Replay(path, speed)
+
+    def request(self, url, body, headers, timeout=None):
+        exchange = self.replay.next(body)
+        time.sleep(self.replay.delay(exchange))
+        return exchange.response(), exchange.data
+
+    @contextmanager
+    def stream(self, url, body, headers, timeout=None):
+        exchange = self.replay.next(body)
+        time.sleep(self.replay.delay(exchange))
+        yield exchange.response()
+
+    def close(self):
+        pass
@@ -1,11 +1,19 @@
 import requests
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import http.client
-from urllib.parse import urlparse
 
-from scorum.api.methods import get_api_name, to_payload
+from scorum.api.methods import get_api_name, to_payload, to_batch_payload, from_batch_response, batch_rejected
+from scorum.api.codec import default_codec
+from scorum.api.compression import ACCEPT_ENCODING, decompress, decompressor
+from scorum.api.jsonstream import ResultStream
+from scorum.api.metrics import default_metrics, describe
+from scorum.api.nodes import select_endpoint, report
+from scorum.api.pool import ConnectionPool, default_pool
+from scorum.api.transport import get_transport
+from scorum.api.retry import default_policy, CircuitOpenError, RETRY_STATUSES
 from scorum.utils.logger import setup_logger, DEFAULT_CONFIG, get_logger
 
 setup_logger(**DEFAULT_CONFIG)
@@ -39,54 +47,257 @@ def call_old(url, api, method, args, retries=5):
         log.error("request failed with code: %d: %s\n%s" % (r.status_code, r.reason, r.text))
 
 
-def call(url, api, method, args, retries=5):
-    r = Request()
+def call(url, api, method, args, retries=5, pool=None, cache=None, retry=None, metrics=None, singleflight=None,
+         compress=False):
+    r = Request(pool, cache, retry=retry, metrics=metrics, singleflight=singleflight, compress=compress)
     return r.call(url, api, method, args, retries)
 
 
+def call_batch(url, calls, retries=5, chunk_size=100, pool=None, retry=None):
+    r = Request(pool, retry=retry)
+    return r.call_batch(url, calls, retries, chunk_size)
+
+
+def call_many(url, calls, workers=8, retries=5, pool=None, cache=None, retry=None, metrics=None):
+    """ Run many (api, method, args) calls on a pool of `workers` threads sharing keep-alive connections.
+
+        Unlike call_batch every call is a separate request, so calls are spread over the nodes of a NodeSet and a
+        slow call does not hold back the others. Without `pool` a pool with room for `workers` idle connections
+        is used for the duration of the call.
+
+        :return: list of (result, error) tuples in the order of calls, error is the exception raised by the call
+                 or None; a failed call that did not raise has a None result as with call()
+    """
+    own_pool = pool is None and isinstance(url, str) and workers > default_pool.maxsize and \
+        get_transport(url) is default_pool
+    if own_pool:
+        pool = ConnectionPool(maxsize=workers)
+
+    def run(call):
+        api, method, args = call
+        try:
+            return Request(pool, cache, retry=retry, metrics=metrics).call(url, api, method, args, retries), None
+        except Exception as e:
+            log.error("%s failed: %s", method, e)
+            return None, e
+
+    try:
+        with ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(run, calls))
+    finally:
+        if own_pool:
+            pool.close()
+
+
 class Request:
-    def __init__(self):
+    def __init__(self, pool=None, cache=None, hedging=None, retry=None, metrics=None, codec=None, singleflight=None,
+                 compress=False):
         self._duration = 0
+        self._headers = {'Content-Type': "application/json"}
+        if compress:
+            # responses are decompressed as they are read, metrics count the bytes on the wire
+            self._headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self._singleflight = singleflight
+        self._codec = codec or default_codec
+        self._metrics = metrics or default_metrics
+        # None picks the transport by endpoint scheme, see transport.TRANSPORTS
+        self._pool = pool
+        self._retry = retry or default_policy
+        self._cache = cache
+        self._hedging = hedging
 
     def duration(self):
         return self._duration
 
+    def _transport(self, endpoint):
+        return self._pool if self._pool is not None else get_transport(endpoint)
+
+    def _send(self, url, payload, retries, exclude=frozenset(), first=None):
+        policy = self._retry
+        deadline = policy.start()
+        failed = set()
+        attempt = 0
+        res, data = None, None
+        body = self._codec.dumps(payload)
+        api, method = describe(payload)
+
+        while attempt < retries:
+            # the first attempt goes to `first` when the caller has already selected it
+            endpoint, first = first or select_endpoint(url, failed | exclude), None
+
+            if not policy.allow(endpoint):
+                if endpoint in failed:
+                    raise CircuitOpenError("Circuit is open for: %s" % endpoint)
+                failed.add(endpoint)
+                continue
+
+            if attempt > 0:
+                delay = policy.delay(attempt, deadline)
+                if delay is None:
+                    break
+                time.sleep(delay)
+
+            attempt += 1
+            ts = time.time()
+
+            try:
+                res, data = self._transport(endpoint).request(endpoint, body, self._headers, policy.timeouts(deadline))
+                size = len(data)
+                data = decompress(data, res.getheader("Content-Encoding"))
+
+                self._duration = time.time() - ts
+
+                self._metrics.observe(api, method, endpoint, self._duration, len(body), size, attempt > 1,
+                                      res.status != 200)
+                report(url, endpoint, self._duration, res.status == 200)
+                policy.record(endpoint, res.status < 500)
+                if self._hedging is not None and res.status == 200:
+                    self._hedging.record(self._duration)
+
+                if res.status not in RETRY_STATUSES:
+                    return res, data
+
+                log.warning("%s responded with %d %s", endpoint, res.status, res.reason)
+                failed.add(endpoint)
+
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                log.error("error during request to %s: %s", endpoint, e)
+                self._metrics.observe(api, method, endpoint, time.time() - ts, len(body), 0, attempt > 1, True)
+                report(url, endpoint, None, False)
+                policy.record(endpoint, False)
+                failed.add(endpoint)
+
+        return res, data
+
     def call(self, url, api, method, args, retries=5):
+        if self._cache is not None and self._cache.cacheable(method):
+            found, result = self._cache.get(method, args)
+            if found:
+                return result
+
         payload = to_payload(method, api, args)
         self._duration = 0
 
-        while retries > 0:
-            try:
-                url_object = urlparse(url)
+        def send():
+            if self._hedging is not None and self._hedging.applies(method):
+                # selected once: selecting has side effects, e.g. it spends the probe of an ejected node
+                first = select_endpoint(url)
+                return self._hedging.run(lambda: self._send(url, payload, retries, first=first),
+                                         lambda: self._send(url, payload, retries, {first}),
+                                         ok=lambda r: r[0] is not None and r[0].status == 200)
+            return self._send(url, payload, retries)
 
-                if url_object.scheme == "https":
-                    conn = http.client.HTTPSConnection(url_object.netloc)
-                else:
-                    conn = http.client.HTTPConnection(url_object.netloc)
+        if self._singleflight is not None and self._singleflight.applies(method):
+            res, data = self._singleflight.do(self._singleflight.key(url, api, method, args), send)
+        else:
+            res, data = send()
 
-                headers = {'Content-Type': "application/json"}
+        if res is None:
+            return None
 
-                ts = time.time()
+        try:
+            response = self._codec.loads(data)
+            result = response["result"]
+        except KeyError:
+            log.error("error response to %s: %s", method, response.get("error"))
+            return None
+        except (ValueError, TypeError) as error:
+            print("request failed with code: %d: %s" % (res.code, res.msg))
+            print(data)
+            return None
 
-                conn.request("POST", url_object.path, json.dumps(payload), headers)
+        if self._cache is not None and self._cache.cacheable(method):
+            self._cache_result(url, method, args, result, len(data))
 
-                self._duration = time.time() - ts
+        return result
+
+    def call_stream(self, url, api, method, args, chunk_size=64 * 1024):
+        """ Yield the elements of an array result one by one while the response is still being received.
+
+            Only the element being received is kept in memory. The call is not retried since elements may already
+            have been consumed when an error occurs.
+        """
+        body = self._codec.dumps(to_payload(method, api, args))
+        endpoint = select_endpoint(url)
+        parser = ResultStream(self._codec)
+        size = 0
+        ts = time.time()
+
+        try:
+            with self._transport(endpoint).stream(endpoint, body, self._headers, self._retry.timeouts()) as res:
+                if res.status != 200:
+                    raise ConnectionError("%s responded with %d %s" % (endpoint, res.status, res.reason))
+
+                d = decompressor(res.getheader("Content-Encoding"))
+                chunk = res.read1(chunk_size)
+                while chunk:
+                    size += len(chunk)
+                    for element in parser.feed(d.decompress(chunk)):
+                        yield element
+                    chunk = res.read1(chunk_size)
+                # marks the response as complete so the connection can be reused
+                res.read()
+
+                for element in parser.feed(d.flush()):
+                    yield element
 
-                res = conn.getresponse()
-                data = res.read().decode('utf-8')
+            for element in parser.close():
+                yield element
+        except (OSError, http.client.HTTPException, ValueError):
+            self._metrics.observe(api, method, endpoint, time.time() - ts, len(body), size, False, True)
+            report(url, endpoint, None, False)
+            raise
+
+        self._duration = time.time() - ts
+        self._metrics.observe(api, method, endpoint, self._duration, len(body), size)
+        report(url, endpoint, self._duration, True)
+
+    def _cache_result(self, url, method, args, result, size):
+        if self._cache.pending_irreversible(method, args, result):
+            # the block may have become irreversible since the last dgp the cache has seen
+            duration = self._duration
+            self.call(url, "database_api", "get_dynamic_global_properties", [])
+            self._duration = duration
+
+        self._cache.put(method, args, result, size)
+
+    def call_batch(self, url, calls, retries=5, chunk_size=100):
+        """ Send many (api, method, args) calls as JSON-RPC batches of at most chunk_size calls.
+
+            A batch rejected by the node is split in halves until it is accepted.
+
+            :return: list of results in the order of calls, None for failed calls
+        """
+        calls = list(calls)
+        results = []
+
+        for i in range(0, len(calls), chunk_size):
+            results += self._call_chunk(url, calls[i:i + chunk_size], retries)
+
+        return results
+
+    def _call_chunk(self, url, calls, retries):
+        if len(calls) == 1:
+            api, method, args = calls[0]
+            return [self.call(url, api, method, args, retries)]
+
+        res, data = self._send(url, to_batch_payload(calls), retries)
+        if res is None:
+            log.error("batch of %d calls to %s failed", len(calls), url)
+            return [None] * len(calls)
+
+        try:
+            response = self._codec.loads(data) if res.status == 200 else None
+        except ValueError:
+            response = None
 
-                try:
-                    response = json.loads(data)
-                    return response["result"]
-                except (ValueError, TypeError) as error:
-                    print("request failed with code: %d: %s" % (res.code, res.msg))
-                    print(data)
-                    return None
+        if isinstance(response, list):
+            return from_batch_response(response, len(calls))
 
-            except (ConnectionResetError, http.client.HTTPException) as e:
-                print("error during request")
-                print(e)
-                time.sleep(0.5)
-                retries -= 1
+        if not batch_rejected(res.status, response):
+            log.error("batch of %d calls to %s failed with %d %s", len(calls), url, res.status, res.reason)
+            return [None] * len(calls)
 
-        return None
+        log.warning("batch of %d calls rejected by %s, splitting", len(calls), url)
+        half = len(calls) // 2
+        return self._call_chunk(url, calls[:half], retries) + self._call_chunk(url, calls[half:], retries)
@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+
+# statuses worth retrying, possibly on another node
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+
+class CircuitOpenError(ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    """ Per-endpoint circuit breaker.
+
+        After `threshold` consecutive failures the endpoint's circuit opens and calls to it fail fast for
+        `reset_timeout` seconds; then a single trial call is let through and its outcome closes or reopens it.
+    """
+    def __init__(self, threshold=5, reset_timeout=30.0):
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = dict()
+        self._opened = dict()
+
+    def allow(self, endpoint):
+        with self._lock:
+            opened = self._opened.get(endpoint)
+            if opened is None:
+                return True
+            if time.monotonic() - opened < self._reset_timeout:
+                return False
+            # half-open: let one trial call through and keep the circuit open for everyone else
+            self._opened[endpoint] = time.monotonic()
+            return True
+
+    def record(self, endpoint, ok):
+        with self._lock:
+            if ok:
+                self._failures.pop(endpoint, None)
+                self._opened.pop(endpoint, None)
+                return
+
+            self._failures[endpoint] = self._failures.get(endpoint, 0) + 1
+            if self._failures[endpoint] >= self._threshold:
+                self._opened[endpoint] = time.monotonic()
+
+    def is_open(self, endpoint):
+        with self._lock:
+            return endpoint in self._opened
+
+
+class RetryBudget:
+    """ Caps retries to a fraction of calls: every call deposits `ratio` tokens, every retry withdraws one. """
+    def __init__(self, ratio=0.2, min_tokens=10, max_tokens=100):
+        self._ratio = ratio
+        self._max_tokens = max_tokens
+        self._tokens = float(min_tokens)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    """ How calls are retried, shared by Request and AsyncClient.
+
+        :param float backoff: base delay of the jittered exponential backoff in seconds
+        :param float max_backoff: upper bound of a single backoff delay
+        :param float deadline: max seconds one call may take including retries, None means no limit
+        :param float connect_timeout: socket connect timeout in seconds
+        :param float read_timeout: socket read timeout in seconds
+        :param RetryBudget budget: optional budget limiting the share of retried calls
+        :param CircuitBreaker breaker: optional per-endpoint circuit breaker
+    """
+    def __init__(self, backoff=0.1, max_backoff=5.0, deadline=None, connect_timeout=10.0, read_timeout=60.0,
+                 budget=None, breaker=None):
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.budget = budget
+        self.breaker = breaker
+
+    def start(self):
+        """ :return: monotonic deadline of a call being started, or None """
+        if self.budget is not None:
+            self.budget.deposit()
+        return None if self.deadline is None else time.monotonic() + self.deadline
+
+    @staticmethod
+    def remaining(deadline):
+        return None if deadline is None else deadline - time.monotonic()
+
+    def delay(self, attempt, deadline=None):
+        """ :return: seconds to sleep before retry number `attempt` or None when the call must give up """
+        if self.budget is not None and not self.budget.withdraw():
+            return None
+
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        remaining = self.remaining(deadline)
+        if remaining is not None and remaining <= delay:
+            return None
+        return delay
+
+    def timeouts(self, deadline=None):
+        """ :return: tuple of (connect, read) timeouts clipped to the deadline """
+        remaining = self.remaining(deadline)
+        if remaining is None:
+            return self.connect_timeout, self.read_timeout
+        return min(self.connect_timeout, remaining), min(self.read_timeout, remaining)
+
+    def allow(self, endpoint):
+        return self.breaker is None or self.breaker.allow(endpoint)
+
+    def record(self, endpoint, ok):
+        if self.breaker is not None:
+            self.breaker.record(endpoint, ok)
+
+
+default_policy = RetryPolicy()
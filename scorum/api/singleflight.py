@@ -0,0 +1,70 @@
+import asyncio
+import concurrent.futures
+import json
+import threading
+
+from scorum.api.hedge import READ_METHODS
+
+
+class SingleFlight:
+    """ Merges identical (url, api, method, args) calls that are in flight at the same time: the first caller
+        sends the request and every caller that asks for the same call before it completes gets its response.
+
+        Usable from threads (do) and coroutines (ado). Only read methods are merged since a merged call is sent
+        once.
+
+        :param set methods: methods that may be merged, READ_METHODS by default
+    """
+    def __init__(self, methods=None):
+        self._methods = READ_METHODS if methods is None else frozenset(methods)
+        self._lock = threading.Lock()
+        self._calls = dict()
+        self._tasks = dict()
+        self.coalesced = 0
+
+    def applies(self, method):
+        return method in self._methods
+
+    @staticmethod
+    def key(url, api, method, args):
+        return url, api, method, json.dumps(args, sort_keys=True)
+
+    def do(self, key, fn):
+        """ Call fn() unless a call with the same key is in flight on another thread, then wait for its result. """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = concurrent.futures.Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def ado(self, key, factory):
+        """ Await factory() unless a call with the same key is in flight, then await its result.
+
+            The call runs as a task of its own, so a cancelled caller does not cancel it for the others.
+        """
+        task = self._tasks.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._tasks.pop(key, None) if self._tasks.get(key) is t else None)
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
@@ -0,0 +1,106 @@
+import asyncio
+from collections import deque, namedtuple
+
+from scorum.api import async_api
+from scorum.api.async_request import AsyncClient
+from scorum.api.limits import AdaptiveLimit
+from scorum.api.blocks import fetch_blocks
+from scorum.utils.logger import get_logger
+
+log = get_logger("stream")
+
+APPLY = "apply"
+ROLLBACK = "rollback"
+
+Event = namedtuple("Event", ["kind", "block_num", "block"])
+
+
+async def astream_blocks(url, start=None, irreversible=False, window=100, concurrency=8,
+                         min_interval=0.2, max_interval=3.0, client=None):
+    """ Follow the chain and yield an Event per block as soon as it appears.
+
+        Blocks behind the head are fetched in parallel bursts via fetch_blocks. The polling interval doubles
+        while there are no new blocks, up to max_interval, and drops back to min_interval once one arrives.
+
+        In head mode (irreversible=False) every block's `previous` is checked against the last applied block;
+        on mismatch a ROLLBACK event is emitted for the last applied block and the stream refetches from there.
+
+        :param int start: first block number to yield, defaults to the current head (or last irreversible block)
+        :param bool irreversible: only yield blocks at or below last_irreversible_block_num
+    """
+    own_client = client is None
+    if own_client:
+        client = AsyncClient(concurrency=AdaptiveLimit())
+
+    next_num = start
+    interval = min_interval
+    applied = deque()
+
+    try:
+        while True:
+            try:
+                dgp = await async_api.get_dgp(url, client=client)
+            except (ConnectionError, TypeError, ValueError) as e:
+                log.error("failed to get dynamic global properties: %s", e)
+                dgp = None
+
+            if dgp is None:
+                await asyncio.sleep(max_interval)
+                continue
+
+            lib = dgp["last_irreversible_block_num"]
+            target = lib if irreversible else dgp["head_block_number"]
+
+            if next_num is None:
+                next_num = target
+
+            if next_num > target:
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, max_interval)
+                continue
+
+            interval = min_interval
+
+            blocks = fetch_blocks(url, next_num, target + 1, window, concurrency, client=client)
+            try:
+                async for block in blocks:
+                    if not irreversible and applied and applied[-1][1] is not None \
+                            and block.get("previous") != applied[-1][1]:
+                        num, _ = applied.pop()
+                        yield Event(ROLLBACK, num, None)
+                        next_num = num
+                        break
+
+                    if not irreversible:
+                        applied.append((next_num, block.get("block_id")))
+
+                    yield Event(APPLY, next_num, block)
+                    next_num += 1
+            except ConnectionError as e:
+                log.error("failed to fetch blocks: %s", e)
+                await asyncio.sleep(interval)
+            finally:
+                await blocks.aclose()
+
+            # irreversible blocks can not be rolled back, keep only the last one to link the next block to
+            while len(applied) > 1 and applied[0][0] <= lib:
+                applied.popleft()
+    finally:
+        if own_client:
+            await client.close()
+
+
+def stream_blocks(url, start=None, irreversible=False, **kwargs):
+    """ Synchronous generator variant of astream_blocks running on a private event loop. """
+    loop = asyncio.new_event_loop()
+    events = astream_blocks(url, start, irreversible, **kwargs)
+
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(events.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(events.aclose())
+        loop.close()
@@ -0,0 +1,462 @@
+""" Local JSON-RPC node serving synthetic or recorded chain data, for tests and benchmarks without a live node.
+
+    python -m scorum.api.stub --port 8090 --latency 0.05 --jitter 0.02 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import socket
+import socketserver
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+from aiohttp import web
+
+from scorum.api.methods import DISCUSSIONS_METHODS
+
+GENESIS = datetime(2018, 1, 1)
+BLOCK_INTERVAL = 3
+
+# get_ops_history `type` filter values
+ALL_OPS, NOT_VIRTUAL_OPS, VIRTUAL_OPS = range(3)
+
+
+def _time(block_num):
+    return (GENESIS + timedelta(seconds=BLOCK_INTERVAL * block_num)).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class Fixtures:
+    """ Synthetic chain answering every method of methods.methods (and get_blocks).
+
+        Every block has one transfer, every third block also a virtual producer_reward. Calls recorded with
+        record() or load() are answered with the recorded result instead.
+
+        :param int head_block: number of the last block
+        :param int accounts: number of accounts, named account00000 and up
+        :param int posts: number of posts, newest first for every get_discussions_by_* method
+    """
+    def __init__(self, head_block=1000, accounts=500, posts=300):
+        self.head_block = head_block
+        self.accounts = ["account%05d" % i for i in range(accounts)]
+        self.posts = [{"author": self.accounts[i % accounts], "permlink": "post-%d" % i,
+                       "created": _time(head_block - i), "category": "football", "body": "post %d" % i}
+                      for i in range(posts)]
+        self.ops = []
+        self._block_ops = defaultdict(list)
+        for n in range(1, head_block + 1):
+            self.ops.append(self._op(n, "transfer", {"from": self._account(n), "to": self._account(n + 1),
+                                                     "amount": "1.000000000 SCR", "memo": ""}, False))
+            if n % 3 == 0:
+                self.ops.append(self._op(n, "producer_reward", {"producer": "witness%d" % (n % 21),
+                                                                "reward": "0.100000000 SP"}, True))
+        for i, op in enumerate(self.ops):
+            self._block_ops[op["block"]].append(i)
+        self._recorded = dict()
+
+    def _account(self, n):
+        return self.accounts[n % len(self.accounts)] if self.accounts else "initdelegate"
+
+    def _op(self, block_num, name, value, virtual):
+        return {"trx_id": "%040x" % (0 if virtual else block_num), "block": block_num, "trx_in_block": 0,
+                "op_in_trx": 0, "virtual_op": int(virtual), "timestamp": _time(block_num), "op": [name, value]}
+
+    @staticmethod
+    def _key(method, args):
+        return method, json.dumps(args, sort_keys=True)
+
+    def record(self, method, args, result):
+        self._recorded[self._key(method, args)] = result
+
+    def load(self, path):
+        """ Load recorded calls from a JSON lines file of {"method": ..., "args": [...], "result": ...} objects. """
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    call = json.loads(line)
+                    self.record(call["method"], call["args"], call["result"])
+
+    def call(self, method, args):
+        key = self._key(method, args)
+        if key in self._recorded:
+            return self._recorded[key]
+
+        if method in DISCUSSIONS_METHODS:
+            return self.get_discussions(args[0])
+
+        handler = getattr(self, method, None)
+        if handler is None or method.startswith("_") or method in ("call", "record", "load"):
+            raise ValueError("unknown method: %s" % method)
+        return handler(*args)
+
+    def block(self, n):
+        if not 0 < n <= self.head_block:
+            return None
+        return {"previous": "%040x" % (n - 1), "timestamp": _time(n), "witness": "witness%d" % (n % 21),
+                "transactions": [{"operations": [self.ops[i]["op"] for i in self._block_ops[n]
+                                                 if not self.ops[i]["virtual_op"]]}]}
+
+    def get_dynamic_global_properties(self):
+        return {"head_block_number": self.head_block, "last_irreversible_block_num": max(0, self.head_block - 15),
+                "time": _time(self.head_block), "current_witness": "witness%d" % (self.head_block % 21)}
+
+    def get_account_count(self):
+        return len(self.accounts)
+
+    def lookup_account_names(self, names):
+        known = set(self.accounts)
+        return [{"name": n, "balance": "10.000000000 SCR"} if n in known else None for n in names]
+
+    def lookup_accounts(self, lower_bound, limit):
+        return [n for n in self.accounts if n >= lower_bound][:limit]
+
+    def get_witnesses(self, ids):
+        return [{"id": i, "owner": "witness%d" % i} for i in ids]
+
+    def get_trending_tags(self, after_tag, limit):
+        return [{"name": "football", "top_posts": len(self.posts)}][:limit]
+
+    def get_tags_used_by_author(self, author):
+        return [["football", 1]] if any(p["author"] == author for p in self.posts) else []
+
+    def get_tags_by_category(self, domain, category):
+        return []
+
+    def get_discussions(self, query):
+        start = 0
+        if "start_author" in query:
+            start = next((i for i, p in enumerate(self.posts)
+                          if p["author"] == query["start_author"] and p["permlink"] == query["start_permlink"]),
+                         len(self.posts))
+        return self.posts[start:start + query.get("limit", 20)]
+
+    def get_content(self, author, permlink):
+        return next((p for p in self.posts if p["author"] == author and p["permlink"] == permlink), None)
+
+    def get_comments(self, parent_author, parent_permlink, depth):
+        return []
+
+    def get_stats_for_time(self, open_time, interval):
+        return {"blocks": 0}
+
+    def get_stats_for_interval(self, start_time, end_time):
+        return {"blocks": 0}
+
+    def get_lifetime_stats(self):
+        return {"blocks": self.head_block}
+
+    def _history(self, from_op, limit, match):
+        # the `limit` matching ops up to from_op, like the node pages backwards through its history index
+        ops = []
+        i = min(from_op, len(self.ops) - 1)
+        while i >= 0 and len(ops) < limit:
+            if match(self.ops[i]):
+                ops.append([i, self.ops[i]])
+            i -= 1
+        return ops[::-1]
+
+    def get_ops_history(self, from_op, limit, type=ALL_OPS):
+        return self._history(from_op, limit, lambda op: type == ALL_OPS or op["virtual_op"] == (type == VIRTUAL_OPS))
+
+    def get_ops_history_by_time(self, from_time, to_time, from_op, limit):
+        return self._history(from_op, limit, lambda op: from_time <= op["timestamp"] < to_time)
+
+    def get_ops_in_block(self, block_num, only_virtual):
+        return [[i, self.ops[i]] for i in self._block_ops.get(block_num, ())
+                if not only_virtual or self.ops[i]["virtual_op"]]
+
+    def get_transaction(self, trx_id):
+        return next(({"operations": [op["op"]], "block_num": op["block"]} for op in self.ops
+                     if op["trx_id"] == trx_id and not op["virtual_op"]), None)
+
+    def get_block_header(self, block_num):
+        block = self.block(block_num)
+        return None if block is None else {k: block[k] for k in ("previous", "timestamp", "witness")}
+
+    def get_block(self, block_num):
+        return self.block(block_num)
+
+    def get_block_headers_history(self, last, limit):
+        return [[n, self.get_block_header(n)] for n in range(max(1, last - limit), min(last, self.head_block + 1))]
+
+    def get_blocks_history(self, last, limit):
+        return [[n, self.block(n)] for n in range(max(1, last - limit), min(last, self.head_block + 1))]
+
+    def get_blocks(self, last, limit):
+        return [self.block(n) for n in range(max(1, last - limit + 1), min(last, self.head_block) + 1)]
+
+    def get_chain_capital(self):
+        return {"total_scr": "1000000.000000000 SCR", "total_sp": "1000000.000000000 SP"}
+
+
+class StubNode(ThreadingHTTPServer):
+    """ Threaded HTTP JSON-RPC node answering from Fixtures, with single and batch calls, keep-alive and gzip.
+
+        :param float latency: seconds every response is delayed by
+        :param float jitter: up to this many more seconds, uniformly distributed
+        :param float error_rate: share of requests answered with a 503
+        :param float rpc_error_rate: share of calls answered with a JSON-RPC error
+        :param float bandwidth: bytes per second a response is written at, unlimited when omitted
+        :param bool compress: gzip responses to clients that accept it
+        :param int seed: seed of the latency and error injection, for reproducible runs
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, fixtures=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rpc_error_rate=0.0, bandwidth=None, compress=True, compress_level=6, seed=0):
+        super().__init__(self._bind_address(host, port), _StubHandler)
+        self.fixtures = fixtures or Fixtures()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rpc_error_rate = rpc_error_rate
+        self.bandwidth = bandwidth
+        self.compress = compress
+        self.compress_level = compress_level
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @staticmethod
+    def _bind_address(host, port):
+        return host, port
+
+    @property
+    def url(self):
+        return "http://%s:%d/" % self.server_address[:2]
+
+    def random(self):
+        with self._lock:
+            return self._random.random()
+
+    def handle_error(self, request, client_address):
+        # benchmarks and tests hang up on purpose, e.g. the loser of a hedged request
+        pass
+
+    def start(self):
+        """ Serve from a daemon thread, returns self. """
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class UnixStubNode(StubNode):
+    """ StubNode serving HTTP on a Unix socket at `path`, its url is unix://path. """
+    address_family = socket.AF_UNIX
+
+    def __init__(self, path, fixtures=None, **kwargs):
+        super().__init__(fixtures, path, **kwargs)
+
+    @staticmethod
+    def _bind_address(host, port):
+        return host
+
+    def server_bind(self):
+        # HTTPServer.server_bind expects a (host, port) address
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+    @property
+    def url(self):
+        return "unix://" + self.server_address
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class WebSocketStubNode:
+    """ JSON-RPC over WebSocket node answering from Fixtures, served by an event loop on a daemon thread.
+
+        Every message is answered concurrently after its own latency, so responses come back out of order as
+        they would from a node under load.
+    """
+    def __init__(self, fixtures=None, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, rpc_error_rate=0.0,
+                 seed=0):
+        self.fixtures = fixtures or Fixtures()
+        self.latency = latency
+        self.jitter = jitter
+        self.rpc_error_rate = rpc_error_rate
+        self.connections = 0
+        self.messages = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sock = socket.socket()
+        self._sock.bind((host, port))
+        self._loop = None
+        self._runner = None
+
+    @property
+    def url(self):
+        return "ws://%s:%d/" % self._sock.getsockname()[:2]
+
+    def random(self):
+        with self._lock:
+            return self._random.random()
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                self.messages += 1
+                asyncio.ensure_future(self._answer(ws, msg.data))
+        return ws
+
+    async def _answer(self, ws, data):
+        delay = _delay(self)
+        if delay:
+            await asyncio.sleep(delay)
+        if not ws.closed:
+            await ws.send_str(json.dumps(_respond(self, json.loads(data))))
+
+    async def _serve(self):
+        app = web.Application()
+        app.router.add_get("/", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.SockSite(self._runner, self._sock).start()
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._serve(), self._loop).result()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def _delay(node):
+    return node.latency + (node.random() * node.jitter if node.jitter else 0)
+
+
+def _respond_one(node, payload):
+    try:
+        if node.rpc_error_rate and node.random() < node.rpc_error_rate:
+            raise ValueError("injected error")
+        api, method, args = payload["params"]
+        return {"jsonrpc": "2.0", "id": payload.get("id"), "result": node.fixtures.call(method, args)}
+    except Exception as e:
+        return {"jsonrpc": "2.0", "id": payload.get("id"), "error": {"code": -32000, "message": str(e)}}
+
+
+def _respond(node, payload):
+    if isinstance(payload, list):
+        return [_respond_one(node, p) for p in payload]
+    return _respond_one(node, payload)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        if self.connection.family != socket.AF_UNIX:
+            # headers and body are written separately, Nagle would hold the body back for a delayed ACK
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        node = self.server
+        with node._lock:
+            node.requests += 1
+
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+        delay = _delay(node)
+        if delay:
+            time.sleep(delay)
+
+        if node.error_rate and node.random() < node.error_rate:
+            return self.send_body(503, b"injected error", "text/plain")
+
+        self.send_body(200, json.dumps(_respond(node, payload)).encode("utf-8"), "application/json")
+
+    def send_body(self, status, body, content_type):
+        node = self.server
+        gzipped = node.compress and "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = gzip.compress(body, node.compress_level)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+
+        if not node.bandwidth:
+            self.wfile.write(body)
+            return
+
+        # paced in 16 KiB slices
+        for i in range(0, len(body), 16384):
+            chunk = body[i:i + 16384]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / float(node.bandwidth))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Scorum JSON-RPC stub node")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--fixtures", help="JSON lines file of recorded calls answered before synthetic data")
+    parser.add_argument("--head-block", type=int, default=1000)
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--posts", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rpc-error-rate", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=float, default=None, help="bytes per second per response")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fixtures = Fixtures(args.head_block, args.accounts, args.posts)
+    if args.fixtures:
+        fixtures.load(args.fixtures)
+
+    node = StubNode(fixtures, args.host, args.port, args.latency, args.jitter, args.error_rate, args.rpc_error_rate,
+                    args.bandwidth, seed=args.seed)
+    print("serving on %s" % node.url)
+    try:
+        node.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        node.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import asyncio
+import http.client
+import io
+import itertools
+import json
+import socket
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import aiohttp
+
+from scorum.api.pool import ConnectionPool, default_pool
+from scorum.utils.logger import get_logger
+
+log = get_logger("transport")
+
+
+class BufferedResponse:
+    """ Stands in for http.client.HTTPResponse and aiohttp.ClientResponse when the whole body is already at hand. """
+    will_close = False
+
+    def __init__(self, status, reason, encoding, data):
+        self.status = self.code = status
+        self.reason = self.msg = reason
+        self.headers = {"Content-Encoding": encoding} if encoding else {}
+        self._body = io.BytesIO(data)
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+    def read(self, amt=-1):
+        return self._body.read(amt)
+
+    def read1(self, amt=-1):
+        return self._body.read(amt)
+
+    def isclosed(self):
+        return self._body.tell() == len(self._body.getbuffer())
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.unix_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class UnixConnectionPool(ConnectionPool):
+    """ ConnectionPool for unix:///path/to/node.sock endpoints of co-located nodes, HTTP over a Unix socket. """
+    def _target(self, url):
+        return ("unix", urlparse(url).path), "/"
+
+    def _connect(self, key):
+        return UnixHTTPConnection(key[1], timeout=self._timeout)
+
+
+class AsyncWebSocket:
+    """ One WebSocket connection multiplexing any number of concurrent JSON-RPC calls.
+
+        Every call or batch element is sent under a request id unique on the connection and the response is
+        matched back by id, with the caller's ids restored. A dropped connection fails the calls in flight and
+        is reopened by the next call. Bound to the event loop it is first used on.
+    """
+    def __init__(self, url, session=None, heartbeat=30.0):
+        self.url = url
+        self._session = session
+        self._own_session = session is None
+        self._heartbeat = heartbeat
+        self._ws = None
+        self._reader = None
+        self._connecting = None
+        self._ids = itertools.count(1)
+        self._pending = dict()
+
+    async def _connect(self):
+        if self._ws is not None and not self._ws.closed:
+            return self._ws
+
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._open())
+        try:
+            return await asyncio.shield(self._connecting)
+        finally:
+            if self._connecting is not None and self._connecting.done():
+                self._connecting = None
+
+    async def _open(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        self._ws = await self._session.ws_connect(self.url, heartbeat=self._heartbeat, max_msg_size=0)
+        self._reader = asyncio.ensure_future(self._read(self._ws))
+        return self._ws
+
+    async def _read(self, ws):
+        try:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT and msg.type != aiohttp.WSMsgType.BINARY:
+                    break
+                try:
+                    response = json.loads(msg.data)
+                except ValueError:
+                    log.error("undecodable message from %s", self.url)
+                    continue
+
+                for item in response if isinstance(response, list) else [response]:
+                    future = self._pending.pop(item.get("id"), None) if isinstance(item, dict) else None
+                    if future is not None and not future.done():
+                        future.set_result(item)
+        finally:
+            self._fail_pending(ConnectionError("WebSocket to %s closed" % self.url))
+
+    def _fail_pending(self, error):
+        pending, self._pending = self._pending, dict()
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def call(self, body, timeout=None):
+        """ Send a JSON-RPC request or batch, :return: the response as bytes """
+        payload = json.loads(body)
+        items = payload if isinstance(payload, list) else [payload]
+        loop = asyncio.get_event_loop()
+        ws = await self._connect()
+
+        ids, futures = [], []
+        for item in items:
+            ids.append(item.get("id"))
+            item["id"] = next(self._ids)
+            future = self._pending[item["id"]] = loop.create_future()
+            futures.append(future)
+
+        try:
+            await ws.send_str(json.dumps(payload))
+            responses = await asyncio.wait_for(asyncio.gather(*futures), timeout)
+        except BaseException:
+            for item in items:
+                self._pending.pop(item["id"], None)
+            raise
+
+        for response, original in zip(responses, ids):
+            response["id"] = original
+        return json.dumps(responses if isinstance(payload, list) else responses[0]).encode("utf-8")
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._own_session and self._session is not None:
+            await self._session.close()
+
+
+class WebSocketTransport:
+    """ Blocking transport for ws:// and wss:// endpoints: one multiplexed AsyncWebSocket per endpoint served by
+        a background event loop thread, so calls from any number of threads share one connection.
+    """
+    def __init__(self, url):
+        self._url = url
+        self._loop = None
+        self._ws = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+                self._ws = AsyncWebSocket(self._url)
+        return self._loop
+
+    def request(self, url, body, headers, timeout=None):
+        """ :return: tuple of (BufferedResponse, bytes) like ConnectionPool.request """
+        read = timeout[1] if timeout is not None else None
+        future = asyncio.run_coroutine_threadsafe(self._ws_call(body, read), self._start())
+        try:
+            data = future.result()
+        except (asyncio.TimeoutError, FutureTimeoutError):
+            raise socket.timeout("no response from %s within %ss" % (url, read))
+        except aiohttp.ClientError as e:
+            raise ConnectionError("WebSocket to %s failed: %s" % (url, e))
+        return BufferedResponse(200, "OK", None, data), data
+
+    async def _ws_call(self, body, timeout):
+        return await self._ws.call(body, timeout)
+
+    @contextmanager
+    def stream(self, url, body, headers, timeout=None):
+        # a WebSocket message arrives whole, the parser still gets it chunk by chunk
+        res, _ = self.request(url, body, headers, timeout)
+        yield res
+
+    def close(self):
+        with self._lock:
+            if self._loop is not None:
+                asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop).result()
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+
+default_unix_pool = UnixConnectionPool()
+
+TRANSPORTS = {
+    "http": lambda url: default_pool,
+    "https": lambda url: default_pool,
+    "unix": lambda url: default_unix_pool,
+    "ws": WebSocketTransport,
+    "wss": WebSocketTransport,
+}
+
+_transports = dict()
+_transports_lock = threading.Lock()
+
+
+def register_transport(scheme, factory):
+    """ :param factory: called with an endpoint url, returns an object with ConnectionPool's request/stream/close """
+    TRANSPORTS[scheme] = factory
+
+
+def get_transport(url):
+    """ :return: the shared transport for url, chosen by its scheme """
+    scheme = urlparse(url).scheme or "http"
+    if scheme not in TRANSPORTS:
+        raise ValueError("no transport for %s, register one with register_transport" % url)
+
+    with _transports_lock:
+        transport = _transports.get(url)
+        if transport is None:
+            transport = _transports[url] = TRANSPORTS[scheme](url)
+        return transport
+
+
+def close_transports():
+    """ Close every transport get_transport has handed out, e.g. before exiting. """
+    with _transports_lock:
+        transports = list(_transports.values())
+        _transports.clear()
+
+    for transport in set(transports):
+        transport.close()
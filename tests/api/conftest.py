@@ -0,0 +1,100 @@
+import gzip
+import json
+import socket
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class Node(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), NodeHandler)
+        self.connections = 0
+        self.requests = []
+        self.drop_connections = False
+        self.max_batch = None
+        self.compress = False
+        self.handler = lambda api, method, args: {"api": api, "method": method, "args": args}
+
+    def handle_error(self, request, client_address):
+        # clients in the tests hang up on purpose, e.g. the loser of a hedged request
+        pass
+
+    @property
+    def url(self):
+        return "http://%s:%d/" % self.server_address
+
+
+class NodeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, payload):
+        api, method, args = payload["params"]
+        try:
+            return {"jsonrpc": "2.0", "id": payload["id"], "result": self.server.handler(api, method, args)}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": payload["id"], "error": {"code": -32000, "message": str(e)}}
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(payload)
+
+        if not isinstance(payload, list):
+            response = self.respond(payload)
+        elif self.server.max_batch is not None and len(payload) > self.server.max_batch:
+            response = {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch too large"}}
+        else:
+            response = [self.respond(p) for p in payload]
+
+        body = json.dumps(response).encode("utf-8")
+        self.close_connection = self.server.drop_connections
+
+        encoding = None
+        accepted = self.headers.get("Accept-Encoding", "")
+        if self.server.compress and "gzip" in accepted:
+            body, encoding = gzip.compress(body), "gzip"
+        elif self.server.compress and "deflate" in accepted:
+            body, encoding = zlib.compress(body), "deflate"
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def node_factory():
+    servers = []
+
+    def start():
+        server = Node()
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def node(node_factory):
+    return node_factory()
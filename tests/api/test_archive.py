@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from scorum.api.archive import BlockArchive
+from scorum.api.blocks import fetch_blocks, iter_blocks
+from scorum.api.stub import Fixtures, StubNode
+from tests.api.test_blocks import blocks_handler, collect
+
+
+def test_archive_random_access(tmpdir):
+    archive = BlockArchive(str(tmpdir), segment_size=10)
+
+    for n in (25, 3, 14, 4):
+        archive.append(n, {"block_num": n})
+
+    assert archive.get(14) == {"block_num": 14}
+    assert archive.get(5) is None
+    assert archive.has_range(3, 5)
+    assert not archive.has_range(3, 6)
+    assert [b for _, b in archive.iter(3, 5)] == [{"block_num": 3}, {"block_num": 4}]
+
+    archive.close()
+    assert BlockArchive(str(tmpdir), segment_size=10).get(25) == {"block_num": 25}
+
+
+def chain_handler(lib):
+    def handler(api, method, args):
+        if method == "get_dynamic_global_properties":
+            return {"head_block_number": lib + 50, "last_irreversible_block_num": lib}
+        return blocks_handler(api, method, args)
+    return handler
+
+
+def test_fetchers_consult_archive(node, tmpdir):
+    node.handler = chain_handler(lib=1000)
+    archive = BlockArchive(str(tmpdir), segment_size=50)
+
+    blocks = asyncio.run(collect(fetch_blocks(node.url, 0, 120, window=20, archive=archive)))
+    requests = len(node.requests)
+
+    assert asyncio.run(collect(fetch_blocks(node.url, 0, 120, window=20, archive=archive))) == blocks
+    assert list(iter_blocks(node.url, 10, 130, window=20, archive=archive)) == blocks[10:] + [
+        {"block_num": n} for n in range(120, 130)]
+    assert len(node.requests) == requests + 1
+
+
+@pytest.mark.parametrize("history", [False, True])
+def test_archive_keeps_irreversible_blocks_under_their_numbers(tmpdir, history):
+    archive = BlockArchive(str(tmpdir), segment_size=50)
+
+    with StubNode(Fixtures(head_block=40)) as stub:
+        # blocks 26..40 are not irreversible yet, below block 1 and past the head the node returns fewer blocks
+        blocks = asyncio.run(collect(fetch_blocks(stub.url, 1, 41, window=10, history=history, archive=archive)))
+        for window in ((0, 10), (35, 45)):
+            with pytest.raises(ConnectionError):
+                asyncio.run(collect(fetch_blocks(stub.url, *window, history=history, archive=archive)))
+
+    assert archive.last_irreversible_block_num == 25
+    assert [n for n in range(50) if archive.has(n)] == list(range(1, 26))
+    assert [archive.get(n) for n in range(1, 26)] == blocks[:25]
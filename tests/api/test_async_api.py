@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+from scorum.api import async_api, async_helpers, AsyncClient
+from scorum.api.methods import methods
+
+from .test_helpers import Accounts, NAMES
+from .test_posts import Discussions, POSTS
+
+
+def test_every_method_has_an_async_wrapper():
+    missing = [m for m in methods if not asyncio.iscoroutinefunction(getattr(async_api, m, None))]
+    assert missing == []
+
+
+def test_async_api_returns_parsed_results(node):
+    node.handler = lambda api, method, args: {"api": api, "method": method, "args": args}
+
+    async def run():
+        async with AsyncClient() as client:
+            return await asyncio.gather(
+                async_api.lookup_accounts(node.url, "a", 10, client=client),
+                async_api.get_content(node.url, "alice", "post", client=client),
+                async_api.get_discussions_by_created(node.url, {"limit": 1}, client=client),
+                async_api.get_ops_in_block(node.url, 5, 0, client=client))
+
+    assert asyncio.run(run()) == [
+        {"api": "database_api", "method": "lookup_accounts", "args": ["a", 10]},
+        {"api": "tags_api", "method": "get_content", "args": ["alice", "post"]},
+        {"api": "tags_api", "method": "get_discussions_by_created", "args": [{"limit": 1}]},
+        {"api": "blockchain_history_api", "method": "get_ops_in_block", "args": [5, 0]}]
+
+
+def test_aget_all_account_objects(node):
+    node.handler = Accounts()
+
+    assert asyncio.run(async_helpers.aget_all_account_names(node.url)) == NAMES
+    objects = asyncio.run(async_helpers.aget_all_account_objects(node.url, chunk_size=30))
+    assert [o["name"] for o in objects] == NAMES
+
+
+def test_aget_all_posts(node):
+    node.handler = Discussions()
+
+    assert asyncio.run(async_helpers.aget_all_posts(node.url)) == POSTS
+    assert asyncio.run(async_helpers.aget_all_posts(node.url, "author3", "post-10")) == POSTS[10:]
+
+
+def test_acrawl_posts_to_jsonl(node, tmpdir):
+    node.handler = Discussions()
+    path = str(tmpdir.join("posts.jsonl"))
+
+    assert asyncio.run(async_helpers.acrawl_posts_to_jsonl(node.url, path, limit=20)) == len(POSTS)
+    assert asyncio.run(async_helpers.acrawl_posts_to_jsonl(node.url, path, limit=20)) == 0
+
+    with open(path) as f:
+        assert [json.loads(line) for line in f] == POSTS
@@ -0,0 +1,33 @@
+import asyncio
+import json
+
+from scorum.api import acall, AsyncClient
+from scorum.api import async_api
+
+
+def test_client_reuses_session_connections(node):
+    async def run():
+        async with AsyncClient(limit_per_host=1) as client:
+            for i in range(5):
+                r = await acall(node.url, "database_api", "lookup_accounts", ["", i], client=client)
+                assert json.loads(r)["result"]["args"] == ["", i]
+
+    asyncio.run(run())
+
+    assert node.connections == 1
+
+
+def test_async_api_routes_through_client(node):
+    node.handler = lambda api, method, args: {"head_block_number": 10}
+
+    async def run():
+        async with AsyncClient() as client:
+            return await asyncio.gather(*[async_api.get_dgp(node.url, client=client) for _ in range(10)])
+
+    assert asyncio.run(run()) == [{"head_block_number": 10}] * 10
+
+
+def test_acall_without_client(node):
+    r = asyncio.run(acall(node.url, "database_api", "get_account_count"))
+
+    assert json.loads(r)["result"]["method"] == "get_account_count"
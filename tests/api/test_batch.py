@@ -0,0 +1,84 @@
+import asyncio
+import socket
+import time
+
+import pytest
+
+from scorum.api import call_batch, call_many, acall_batch, AsyncClient, Metrics, RetryPolicy
+from scorum.api.request import Request
+from scorum.api.methods import to_batch_payload, from_batch_response
+
+
+def test_batch_payload_has_unique_ids():
+    payload = to_batch_payload([("database_api", "get_account_count", []), (None, "get_block", [1])])
+
+    assert [p["id"] for p in payload] == ["0", "1"]
+    assert payload[1]["params"] == ["blockchain_history_api", "get_block", [1]]
+
+
+def test_batch_response_is_demultiplexed_by_id():
+    response = [{"id": "1", "result": "b"}, {"id": "0", "result": "a"}, {"id": "2", "error": {}}]
+
+    assert from_batch_response(response, 3) == ["a", "b", None]
+
+
+@pytest.mark.parametrize("max_batch", [None, 3])
+def test_call_batch(node, max_batch):
+    node.max_batch = max_batch
+    calls = [("blockchain_history_api", "get_block", [i]) for i in range(10)]
+
+    results = call_batch(node.url, calls, chunk_size=8)
+
+    assert [r["args"] for r in results] == [[i] for i in range(10)]
+
+
+@pytest.mark.parametrize("max_batch", [None, 3])
+def test_acall_batch(node, max_batch):
+    node.max_batch = max_batch
+    calls = [("blockchain_history_api", "get_block", [i]) for i in range(10)]
+
+    results = asyncio.run(acall_batch(node.url, calls, chunk_size=8))
+
+    assert [r["args"] for r in results] == [[i] for i in range(10)]
+
+
+def test_batch_to_dead_node_is_not_split():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        url = "http://127.0.0.1:%d/" % s.getsockname()[1]
+    calls = [("blockchain_history_api", "get_block", [i]) for i in range(64)]
+    sync_metrics, async_metrics = Metrics(), Metrics()
+
+    async def run():
+        async with AsyncClient(retry=RetryPolicy(backoff=0.001), metrics=async_metrics) as client:
+            return await client.call_batch(url, calls, retries=3)
+
+    assert Request(retry=RetryPolicy(backoff=0.001), metrics=sync_metrics).call_batch(url, calls, 3) == [None] * 64
+    assert asyncio.run(run()) == [None] * 64
+    # one retry loop per chunk, no halves
+    assert [s["count"] for s in sync_metrics.snapshot()] == [3]
+    assert [s["count"] for s in async_metrics.snapshot()] == [3]
+
+
+def test_call_many_keeps_order_and_captures_errors(node):
+    calls = [("blockchain_history_api", "get_block", [i]) for i in range(20)] + [(None, "no_such_method", [])]
+
+    results = call_many(node.url, calls, workers=12)
+
+    assert [r["args"] for r, error in results[:20]] == [[i] for i in range(20)]
+    assert all(error is None for r, error in results[:20])
+    assert results[20][0] is None and "no api" in str(results[20][1])
+
+
+def test_call_many_runs_calls_concurrently(node):
+    def slow(api, method, args):
+        time.sleep(0.2)
+        return args
+
+    node.handler = slow
+    ts = time.time()
+
+    results = call_many(node.url, [(None, "get_block", [i]) for i in range(8)], workers=8)
+
+    assert [r for r, _ in results] == [[i] for i in range(8)]
+    assert time.time() - ts < 1.0
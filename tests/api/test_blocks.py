@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from scorum.api.blocks import fetch_blocks, iter_blocks
+from scorum.api.stub import Fixtures, StubNode
+
+
+def blocks_handler(api, method, args):
+    last, limit = args
+    if method == "get_blocks_history":
+        return [[n, {"block_num": n}] for n in range(last - limit, last)]
+    return [{"block_num": n} for n in range(last - limit + 1, last + 1)]
+
+
+async def collect(aiterable):
+    return [item async for item in aiterable]
+
+
+@pytest.mark.parametrize("history", [False, True])
+def test_fetch_blocks_in_order(node, history):
+    node.handler = blocks_handler
+
+    blocks = asyncio.run(collect(fetch_blocks(node.url, 5, 108, window=10, concurrency=4, history=history)))
+
+    assert [b["block_num"] for b in blocks] == list(range(5, 108))
+
+
+def test_fetch_blocks_requests_windows_ahead_of_consumer_only(node):
+    node.handler = blocks_handler
+
+    async def run():
+        it = fetch_blocks(node.url, 0, 10000, window=10, concurrency=3)
+        await it.__anext__()
+        await asyncio.sleep(0.1)
+        await it.aclose()
+
+    asyncio.run(run())
+
+    assert len(node.requests) == 4
+
+
+@pytest.mark.parametrize("history", [False, True])
+def test_fetch_blocks_past_head_raises(history):
+    with StubNode(Fixtures(head_block=50)) as stub:
+        with pytest.raises(ConnectionError):
+            asyncio.run(collect(fetch_blocks(stub.url, 45, 60, window=10, history=history)))
+        with pytest.raises(ConnectionError):
+            list(iter_blocks(stub.url, 45, 60, window=10))
+
+        assert [b["timestamp"] for b in asyncio.run(collect(fetch_blocks(stub.url, 45, 51, history=history)))] == \
+            [stub.fixtures.block(n)["timestamp"] for n in range(45, 51)]
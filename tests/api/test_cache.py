@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from scorum.api import ResponseCache, AsyncClient
+from scorum.api.request import Request
+
+
+class Chain:
+    def __init__(self, lib):
+        self.lib = lib
+
+    def __call__(self, api, method, args):
+        if method == "get_dynamic_global_properties":
+            return {"head_block_number": self.lib + 20, "last_irreversible_block_num": self.lib}
+        return {"block_num": args[0]}
+
+
+def test_cache_stores_only_irreversible_blocks(node):
+    chain = Chain(lib=10)
+    node.handler = chain
+    r = Request(cache=ResponseCache())
+
+    for _ in range(3):
+        assert r.call(node.url, "blockchain_history_api", "get_block", [5]) == {"block_num": 5}
+        assert r.call(node.url, "blockchain_history_api", "get_block", [15]) == {"block_num": 15}
+
+    assert [p["params"][1] for p in node.requests].count("get_block") == 4
+
+    chain.lib = 20
+    r._cache.clear()
+    r.call(node.url, "blockchain_history_api", "get_block", [15])
+    requests = len(node.requests)
+    r.call(node.url, "blockchain_history_api", "get_block", [15])
+
+    assert len(node.requests) == requests
+
+
+def test_cached_results_can_not_be_modified_by_callers(node):
+    node.handler = Chain(lib=10)
+    r = Request(cache=ResponseCache())
+
+    for _ in range(3):
+        block = r.call(node.url, "blockchain_history_api", "get_block", [5])
+        assert block == {"block_num": 5}
+        block["block_num"] = 6
+
+    assert [p["params"][1] for p in node.requests].count("get_block") == 1
+
+
+def test_cache_ttl_tier():
+    cache = ResponseCache(ttl=0)
+
+    assert cache.put("get_dynamic_global_properties", [], {"last_irreversible_block_num": 7})
+    assert cache.get("get_dynamic_global_properties", []) == (False, None)
+    assert cache.last_irreversible_block_num == 7
+    assert not cache.put("get_witnesses", [], [])
+
+
+def test_cache_is_bounded_and_counts():
+    cache = ResponseCache(max_entries=2)
+    cache.last_irreversible_block_num = 100
+
+    for n in range(3):
+        cache.put("get_block", [n], {"block_num": n})
+
+    assert cache.get("get_block", [0]) == (False, None)
+    assert cache.get("get_block", [2]) == (True, {"block_num": 2})
+    assert cache.stats() == {"entries": 2, "bytes": cache.stats()["bytes"], "hits": 1, "misses": 1, "evictions": 1}
+
+    cache = ResponseCache(max_bytes=10)
+    cache.put("lookup_account_names", [["alice"]], [], size=6)
+    cache.put("lookup_account_names", [["bob"]], [], size=6)
+
+    assert cache.stats()["entries"] == 1
+
+
+def test_async_client_uses_cache(node):
+    node.handler = Chain(lib=10)
+
+    async def run():
+        async with AsyncClient(cache=ResponseCache()) as client:
+            return [json.loads(await client.call(node.url, "blockchain_history_api", "get_block", [5]))["result"]
+                    for _ in range(3)]
+
+    assert asyncio.run(run()) == [{"block_num": 5}] * 3
+    assert [p["params"][1] for p in node.requests] == ["get_block", "get_dynamic_global_properties"]
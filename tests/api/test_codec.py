@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from scorum.api import acall, get_codec
+from scorum.api.codec import CODECS
+from scorum.api.request import Request
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_codec_roundtrip(name):
+    try:
+        codec = get_codec(name)
+    except ImportError:
+        pytest.skip("%s is not installed" % name)
+
+    data = codec.dumps({"id": "0", "params": ["database_api", "lookup_accounts", ["", 100]]})
+
+    assert isinstance(data, bytes)
+    assert codec.loads(data)["params"][2] == ["", 100]
+    assert codec.loads(data.decode("utf-8"))["id"] == "0"
+
+
+def test_default_codec_is_available():
+    assert get_codec().name in CODECS
+
+
+def test_acall_returns_parsed_result(node):
+    r = asyncio.run(acall(node.url, "database_api", "get_account_count", parse=True))
+
+    assert r == {"api": "database_api", "method": "get_account_count", "args": []}
+
+
+def test_request_uses_codec(node):
+    codec = get_codec("json")
+    r = Request(codec=codec)
+
+    assert r.call(node.url, "database_api", "get_account_count", [])["method"] == "get_account_count"
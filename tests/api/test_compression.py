@@ -0,0 +1,71 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+from scorum.api import call, AsyncClient, Metrics
+from scorum.api.compression import decompress, decompressor
+from scorum.api.request import Request
+
+BLOCKS = [[i, {"witness": "witness%d" % (i % 21), "transactions": []}] for i in range(500)]
+
+
+def blocks(api, method, args):
+    return BLOCKS
+
+
+@pytest.mark.parametrize("encode,encoding", [(gzip.compress, "gzip"), (zlib.compress, "deflate"),
+                                             (lambda b: b, None)])
+def test_decompressor_handles_chunks(encode, encoding):
+    data = encode(b"x" * 10000)
+    d = decompressor(encoding)
+
+    assert b"".join(d.decompress(data[i:i + 7]) for i in range(0, len(data), 7)) + d.flush() == b"x" * 10000
+
+
+def test_corrupt_or_unknown_encoding_is_a_value_error():
+    with pytest.raises(ValueError):
+        decompress(b"not gzip", "gzip")
+    with pytest.raises(ValueError):
+        decompressor("br")
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_sync_call_negotiates_compression(node, compress):
+    node.handler = blocks
+    node.compress = True
+    metrics = Metrics()
+
+    assert call(node.url, None, "get_blocks_history", [500, 500], metrics=metrics, compress=compress) == BLOCKS
+
+    wire = metrics.snapshot()[0]["response_bytes"]
+    assert (wire < 10000) == compress
+
+
+def test_sync_stream_decompresses_on_the_fly(node):
+    node.handler = blocks
+    node.compress = True
+
+    r = Request(compress=True)
+    assert list(r.call_stream(node.url, None, "get_blocks_history", [500, 500], chunk_size=256)) == BLOCKS
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_async_call_negotiates_compression(node, compress):
+    node.handler = blocks
+    node.compress = True
+    metrics = Metrics()
+
+    async def run():
+        async with AsyncClient(metrics=metrics, compress=compress) as client:
+            api = "blockchain_history_api"
+            result = await client.call(node.url, api, "get_blocks_history", [500, 500], parse=True)
+            streamed = [e async for e in client.call_stream(node.url, api, "get_blocks_history", [500, 500], 256)]
+            return result, streamed
+
+    assert asyncio.run(run()) == (BLOCKS, BLOCKS)
+
+    series = metrics.snapshot()[0]
+    assert series["count"] == 2
+    assert (series["response_bytes"] < 20000) == compress
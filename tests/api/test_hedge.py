@@ -0,0 +1,125 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from scorum.api import AsyncClient, AdaptiveLimit, Hedging, NodeSet
+from scorum.api.request import Request
+from scorum.api.stub import StubNode
+
+
+def stall(api, method, args):
+    time.sleep(0.5)
+    return "stalled"
+
+
+def test_hedging_delay_follows_percentile():
+    hedging = Hedging(percentile=90, initial_delay=2.0, min_samples=10)
+    assert hedging.delay() == 2.0
+
+    for i in range(100):
+        hedging.record(i / 100.0)
+
+    assert hedging.delay() == 0.9
+    assert not Hedging(methods=["get_block"]).applies("get_content")
+
+
+def fail_later():
+    time.sleep(0.1)
+    raise ConnectionError("node went away")
+
+
+def answer_later():
+    time.sleep(0.2)
+    return "answer"
+
+
+def test_hedge_answers_although_the_primary_raised():
+    hedging = Hedging(initial_delay=0.05)
+
+    assert hedging.run(fail_later, answer_later) == "answer"
+    assert hedging.run(answer_later, fail_later) == "answer"
+    with pytest.raises(ConnectionError):
+        hedging.run(fail_later, fail_later)
+
+    async def run(primary, hedge):
+        return await hedging.arun(asyncio.to_thread(primary), asyncio.to_thread(hedge))
+
+    assert asyncio.run(run(fail_later, answer_later)) == "answer"
+    with pytest.raises(ConnectionError):
+        asyncio.run(run(fail_later, fail_later))
+
+
+def test_sync_hedged_call_does_not_accept_an_error_status():
+    with StubNode(latency=0.1, error_rate=1.0) as failing, StubNode(latency=0.2) as slow:
+        r = Request(hedging=Hedging(initial_delay=0.05))
+        block = r.call(NodeSet([failing.url, slow.url]), "blockchain_history_api", "get_block", [1], retries=1)
+
+    assert block == slow.fixtures.block(1)
+    assert r._hedging.hedge_wins == 1
+
+
+def test_sync_hedged_call(node_factory):
+    stalled, fast = node_factory(), node_factory()
+    stalled.handler = stall
+    r = Request(hedging=Hedging(initial_delay=0.05))
+
+    ts = time.time()
+    result = r.call(NodeSet([stalled.url, fast.url]), "blockchain_history_api", "get_block", [1])
+
+    assert time.time() - ts < 0.4
+    assert result["method"] == "get_block"
+    assert r._hedging.hedge_wins == 1
+
+
+def test_async_hedged_call(node_factory):
+    stalled, fast = node_factory(), node_factory()
+    stalled.handler = stall
+
+    async def run():
+        async with AsyncClient(hedging=Hedging(initial_delay=0.05)) as client:
+            return await client.call(NodeSet([stalled.url, fast.url]), "blockchain_history_api", "get_block", [1])
+
+    ts = time.time()
+    result = json.loads(asyncio.run(run()))
+
+    assert time.time() - ts < 0.4
+    assert result["result"]["method"] == "get_block"
+
+
+def test_hedged_call_probes_ejected_node(node_factory):
+    ejected, other = node_factory(), node_factory()
+    nodes = NodeSet([ejected.url, other.url], max_failures=1, cooldown=0.05)
+    r = Request(hedging=Hedging(initial_delay=1.0))
+
+    async def acall():
+        async with AsyncClient(hedging=Hedging(initial_delay=1.0)) as client:
+            return await client.call(nodes, "blockchain_history_api", "get_block", [1], parse=True)
+
+    for call in (lambda: r.call(nodes, "blockchain_history_api", "get_block", [1]), lambda: asyncio.run(acall())):
+        nodes.report(ejected.url, None, False)
+        time.sleep(0.1)
+
+        # the probe after the cool-down is the hedged call's primary request
+        assert call()["method"] == "get_block"
+        assert nodes.available() == [ejected.url, other.url]
+
+    assert len(ejected.requests) == 2
+    assert len(other.requests) == 0
+
+
+def test_cancelled_hedge_losers_do_not_shrink_the_limit(node_factory):
+    stalled, fast = node_factory(), node_factory()
+    stalled.handler = stall
+
+    async def run():
+        async with AsyncClient(hedging=Hedging(initial_delay=0.02), concurrency=AdaptiveLimit(initial=16)) as client:
+            for _ in range(5):
+                await client.call(NodeSet([stalled.url, fast.url]), "blockchain_history_api", "get_block", [1])
+            return client.concurrency
+
+    limit = asyncio.run(run())
+
+    assert limit.limit >= 16
+    assert limit.inflight == 0
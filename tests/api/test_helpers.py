@@ -0,0 +1,97 @@
+import asyncio
+import string
+import time
+
+import pytest
+
+from scorum.api import helpers, AsyncClient, RetryPolicy
+from scorum.api.async_helpers import ascan_accounts, alookup_accounts_bulk, shard_bounds
+
+NAMES = sorted(a + b for a in string.ascii_lowercase for b in "0123456789")
+
+
+class Accounts:
+    def __call__(self, api, method, args):
+        if method == "lookup_accounts":
+            start, limit = args
+            return [n for n in NAMES if n >= start][:limit]
+        if method == "lookup_account_names":
+            return [{"name": n} for n in args[0]]
+        if method == "get_account_count":
+            return len(NAMES)
+
+
+def test_shard_bounds():
+    assert shard_bounds(1) == [("", None)]
+    assert shard_bounds(2) == [("", "n"), ("n", None)]
+
+
+@pytest.mark.parametrize("shards", [1, 3, 26])
+def test_ascan_accounts(node, shards):
+    node.handler = Accounts()
+    objects = []
+
+    async def callback(page):
+        objects.extend(page)
+
+    asyncio.run(ascan_accounts(node.url, callback, limit=7, shards=shards))
+
+    assert sorted(o["name"] for o in objects) == NAMES
+
+
+def test_scan_accounts_concurrently(node):
+    node.handler = Accounts()
+    objects = []
+
+    helpers.scan_accounts_concurrently(node.url, objects.extend, limit=50)
+
+    assert sorted(o["name"] for o in objects) == NAMES
+
+
+class FlakyAccounts(Accounts):
+    def __init__(self):
+        self.failed = set()
+
+    def __call__(self, api, method, args):
+        if method == "lookup_account_names" and args[0][0] not in self.failed:
+            self.failed.add(args[0][0])
+            raise ValueError("node overloaded")
+        return super().__call__(api, method, args)
+
+
+def test_lookup_accounts_bulk_retries_failed_chunks(node):
+    node.handler = FlakyAccounts()
+
+    objects = list(helpers.lookup_accounts_bulk(node.url, iter(NAMES), chunk_size=30, workers=3))
+
+    assert [o["name"] for o in objects] == NAMES
+
+
+def test_alookup_accounts_bulk(node):
+    node.handler = FlakyAccounts()
+
+    async def run():
+        return [o async for o in alookup_accounts_bulk(node.url, iter(NAMES), chunk_size=30, concurrency=3)]
+
+    assert [o["name"] for o in asyncio.run(run())] == NAMES
+
+
+def test_get_all_account_objects(node):
+    node.handler = Accounts()
+
+    assert [o["name"] for o in helpers.get_all_account_objects(node.url, chunk_size=40)] == NAMES
+
+
+def test_alookup_accounts_bulk_backs_off_between_chunk_retries(node):
+    node.handler = FlakyAccounts()
+
+    policy = RetryPolicy()
+    policy.delay = lambda attempt, deadline=None: 0.2
+
+    async def run():
+        async with AsyncClient(retry=policy) as client:
+            return [o async for o in alookup_accounts_bulk(node.url, iter(NAMES[:30]), chunk_size=30, client=client)]
+
+    ts = time.time()
+    assert [o["name"] for o in asyncio.run(run())] == NAMES[:30]
+    assert time.time() - ts >= 0.2
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import pytest
+
+from scorum.api import api, async_api, AsyncClient
+from scorum.api.jsonstream import ResultStream
+
+RESULT = [[i, {"block_num": i, "witness": "a\\\"b],{\\\\", "ops": [1, {"x": []}]}] for i in range(50)] + ["x,y", 5, None]
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("chunk", [1, 3, 64, 100000])
+def test_result_stream_yields_every_element(indent, chunk):
+    data = json.dumps({"jsonrpc": "2.0", "id": "0", "result": RESULT}, indent=indent).encode()
+    parser = ResultStream()
+    elements = []
+
+    for i in range(0, len(data), chunk):
+        elements += parser.feed(data[i:i + chunk])
+        assert len(parser._buf) <= max(chunk, 200)
+
+    assert elements + parser.close() == RESULT
+
+
+def test_result_stream_non_array_and_error_responses():
+    parser = ResultStream()
+    parser.feed(b'{"id": "0", "result": {"head_block_number": 1}}')
+    assert parser.close() == [{"head_block_number": 1}]
+
+    parser = ResultStream()
+    parser.feed(b'{"id": "0", "error": {"message": "bad"}}')
+    with pytest.raises(ValueError):
+        parser.close()
+
+    parser = ResultStream()
+    parser.feed(b'{"id": "0", "result": [1, 2')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_stream_history_calls(node):
+    node.handler = lambda api, method, args: RESULT
+
+    assert list(api.iter_blocks_history(node.url, 0, 100)) == RESULT
+    assert list(api.iter_ops_history(node.url, 0, 100)) == RESULT
+
+    async def run():
+        async with AsyncClient() as client:
+            return [e async for e in async_api.aiter_blocks_history(node.url, 0, 100, client)]
+
+    assert asyncio.run(run()) == RESULT
+    assert node.connections == 2
@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+from scorum.api import AsyncClient, TokenBucket, AdaptiveLimit
+from scorum.api import blocks
+from scorum.api.stub import Fixtures, StubNode
+from tests.api.test_blocks import blocks_handler, collect
+
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=100, burst=5)
+
+    ts = time.time()
+    for _ in range(15):
+        bucket.acquire()
+
+    assert 0.08 < time.time() - ts < 0.3
+
+
+def test_adaptive_limit_increases_on_flat_latency_and_backs_off_on_errors():
+    limit = AdaptiveLimit(initial=4, max_limit=10)
+
+    async def run():
+        for _ in range(100):
+            await limit.acquire()
+            limit.release(0.01, True)
+
+    asyncio.run(run())
+    assert limit.limit == 10
+
+    limit.inflight = 1
+    limit.release(None, False)
+    assert limit.limit == 7
+    # a stream is no signal either way
+    limit.inflight = 1
+    limit.release(ok=None)
+    assert limit.limit == 7
+
+
+def test_adaptive_limit_backs_off_on_sustained_latency_growth_only():
+    limit = AdaptiveLimit(initial=10, max_limit=10)
+
+    for latency in [0.01] * 50 + [0.1]:
+        limit.inflight = 1
+        limit.release(latency, True)
+    assert limit.limit == 10
+
+    for _ in range(10):
+        limit.inflight = 1
+        limit.release(0.1, True)
+    assert limit.limit < 10
+
+
+def test_adaptive_limit_keeps_latency_per_method():
+    limit = AdaptiveLimit(initial=10, max_limit=10)
+
+    limit.inflight = 1
+    limit.release(0.005, True, "get_dynamic_global_properties")
+    for _ in range(100):
+        limit.inflight = 1
+        limit.release(0.2, True, "get_blocks")
+    assert limit.limit == 10
+
+
+def test_adaptive_limit_bounds_requests_in_flight():
+    limit = AdaptiveLimit(initial=3, min_limit=3, max_limit=3)
+    peak = 0
+
+    async def task():
+        nonlocal peak
+        await limit.acquire()
+        peak = max(peak, limit.inflight)
+        await asyncio.sleep(0.01)
+        limit.release(0.01, True)
+
+    async def run():
+        await asyncio.gather(*[task() for _ in range(20)])
+
+    asyncio.run(run())
+    assert peak == 3
+    assert limit.inflight == 0
+
+
+def test_adaptive_limit_passes_on_the_wakeup_of_a_cancelled_waiter():
+    limit = AdaptiveLimit(initial=1, max_limit=1)
+
+    async def run():
+        await limit.acquire()
+        woken = asyncio.ensure_future(limit.acquire())
+        waiting = asyncio.ensure_future(limit.acquire())
+        await asyncio.sleep(0)
+
+        limit.release(0.01, True)
+        woken.cancel()
+        await asyncio.wait_for(waiting, 1.0)
+
+    asyncio.run(run())
+    assert limit.inflight == 1
+
+
+def test_client_applies_rate_limit(node):
+    async def run():
+        async with AsyncClient(rate_limiter=TokenBucket(rate=50, burst=1)) as client:
+            await asyncio.gather(*[client.call(node.url, "database_api", "get_account_count") for _ in range(6)])
+
+    ts = time.time()
+    asyncio.run(run())
+
+    assert time.time() - ts > 0.09
+    assert len(node.requests) == 6
+
+
+def test_adaptive_limit_does_not_collapse_on_jitter():
+    async def run(url):
+        async with AsyncClient(concurrency=AdaptiveLimit()) as client:
+            await asyncio.gather(*[client.call(url, None, "get_block", [n % 100 + 1]) for n in range(600)])
+            return client.concurrency.limit
+
+    with StubNode(Fixtures(head_block=100), latency=0.02, jitter=0.04) as stub:
+        assert asyncio.run(run(stub.url)) >= 16
+
+
+def test_client_has_no_concurrency_limit_by_default():
+    assert AsyncClient().concurrency is None
+
+
+def test_fetchers_limit_the_clients_they_create(node, monkeypatch):
+    clients = []
+
+    def client(**kwargs):
+        clients.append(AsyncClient(**kwargs))
+        return clients[-1]
+
+    node.handler = blocks_handler
+    monkeypatch.setattr(blocks, "AsyncClient", client)
+    asyncio.run(collect(blocks.fetch_blocks(node.url, 1, 50, window=10)))
+
+    assert isinstance(clients[0].concurrency, AdaptiveLimit)
@@ -0,0 +1,52 @@
+import asyncio
+import urllib.request
+
+from scorum.api import call, AsyncClient, Metrics
+
+
+def test_metrics_record_sync_and_async_calls(node):
+    metrics = Metrics()
+    call(node.url, "database_api", "get_account_count", [], metrics=metrics)
+    call(node.url, "database_api", "get_account_count", [], metrics=metrics)
+
+    async def run():
+        async with AsyncClient(metrics=metrics) as client:
+            await client.call(node.url, "blockchain_history_api", "get_block", [1])
+
+    asyncio.run(run())
+
+    series = {s["method"]: s for s in metrics.snapshot()}
+
+    assert series["get_account_count"]["count"] == 2
+    assert series["get_account_count"]["endpoint"] == node.url
+    assert series["get_account_count"]["response_bytes"] > 0
+    assert series["get_block"]["api"] == "blockchain_history_api"
+    assert sum(count for _, count in series["get_block"]["buckets"]) == 1
+    assert series["get_block"]["errors"] == 0
+
+
+def test_metrics_count_retries_and_errors():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.observe("database_api", "get_account_count", "http://a", 0.05, 10, 20)
+    metrics.observe("database_api", "get_account_count", "http://a", 5.0, 10, 0, retry=True, error=True)
+
+    s = metrics.snapshot()[0]
+
+    assert s["buckets"] == [(0.1, 1), (1.0, 0), (float("inf"), 1)]
+    assert (s["retries"], s["errors"], s["request_bytes"]) == (1, 1, 20)
+
+
+def test_prometheus_exporter():
+    metrics = Metrics(buckets=(0.1,))
+    metrics.observe("database_api", "get_account_count", "http://a", 0.05)
+    server = metrics.serve(port=0)
+
+    try:
+        text = urllib.request.urlopen("http://127.0.0.1:%d/metrics" % server.server_address[1]).read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert 'scorum_rpc_duration_seconds_bucket{api="database_api",method="get_account_count",' \
+           'endpoint="http://a",le="+Inf"} 1' in text
+    assert 'scorum_rpc_errors_total{api="database_api",method="get_account_count",endpoint="http://a"} 0' in text
@@ -0,0 +1,51 @@
+import asyncio
+import json
+import time
+
+from scorum.api import call, acall, NodeSet
+
+
+def slow(api, method, args):
+    time.sleep(0.05)
+    return "slow"
+
+
+def test_routes_to_fastest_node(node_factory):
+    fast, slow_node = node_factory(), node_factory()
+    slow_node.handler = slow
+    nodes = NodeSet([slow_node.url, fast.url])
+
+    for _ in range(20):
+        call(nodes, "database_api", "get_account_count", [])
+
+    assert len(slow_node.requests) == 1
+    assert len(fast.requests) == 19
+
+
+def test_fails_over_and_ejects_dead_node(node_factory):
+    alive, dead = node_factory(), node_factory()
+    dead.shutdown()
+    dead.server_close()
+    nodes = NodeSet([dead.url, alive.url], max_failures=1, cooldown=60)
+
+    assert call(nodes, "database_api", "get_account_count", [])["method"] == "get_account_count"
+    assert nodes.available() == [alive.url]
+
+    async def run():
+        return [json.loads(await acall(nodes, "database_api", "get_account_count")) for _ in range(3)]
+
+    assert len(asyncio.run(run())) == 3
+    assert len(alive.requests) == 4
+
+
+def test_ejected_node_is_probed_back():
+    nodes = NodeSet(["http://a", "http://b"], max_failures=2, cooldown=0.05)
+    nodes.report("http://a", 0.1, True)
+    nodes.report("http://b", 0.2, True)
+    nodes.report("http://a", None, False)
+    nodes.report("http://a", None, False)
+
+    assert nodes.select() == "http://b"
+
+    time.sleep(0.06)
+    assert nodes.select() == "http://a"
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from scorum.api import helpers
+from scorum.api.async_helpers import ascan_ops_history, ascan_ops_history_by_time, op_windows
+
+OPS = [{"op": ["transfer" if i % 3 == 0 else "vote", {}], "timestamp": i} for i in range(250)]
+TRANSFERS = 1
+
+
+class History:
+    def __call__(self, api, method, args):
+        if method == "get_ops_history":
+            from_op, limit, type = args
+            seqs = [i for i in range(min(from_op, len(OPS) - 1) + 1) if type != TRANSFERS or i % 3 == 0]
+        elif method == "get_ops_history_by_time":
+            from_time, to_time, from_op, limit = args
+            seqs = [i for i in range(min(from_op, len(OPS) - 1) + 1) if from_time <= OPS[i]["timestamp"] < to_time]
+        else:
+            raise ValueError(method)
+        # like the node: the `limit` ops up to from_op, passing the type filter
+        return [[i, OPS[i]] for i in seqs[-limit:]]
+
+
+def is_vote(op):
+    return op["op"][0] == "vote"
+
+
+def test_op_windows():
+    assert op_windows(0, 250, 100) == [(0, 100), (100, 200), (200, 250)]
+    assert op_windows(5, 5, 100) == []
+
+
+def test_scan_ops_history(node):
+    node.handler = History()
+
+    assert list(helpers.scan_ops_history(node.url, window=7)) == list(enumerate(OPS))
+    assert list(helpers.scan_ops_history(node.url, 10, 20, window=3)) == list(enumerate(OPS))[10:20]
+
+
+def test_scan_ops_history_filters(node):
+    node.handler = History()
+
+    transfers = [(i, op) for i, op in enumerate(OPS) if i % 3 == 0]
+    assert list(helpers.scan_ops_history(node.url, window=10, type=TRANSFERS)) == transfers
+
+    votes = [(i, op) for i, op in enumerate(OPS) if is_vote(op)]
+    assert list(helpers.scan_ops_history(node.url, window=10, predicate=is_vote)) == votes
+
+
+@pytest.mark.parametrize("type", [0, TRANSFERS])
+def test_ascan_ops_history(node, type):
+    node.handler = History()
+
+    async def scan():
+        return [op async for op in ascan_ops_history(node.url, window=9, concurrency=4, type=type)]
+
+    assert asyncio.run(scan()) == list(helpers.scan_ops_history(node.url, type=type))
+
+
+def test_scan_ops_history_by_time(node):
+    node.handler = History()
+    expected = [(i, OPS[i]) for i in range(159, 39, -1)]
+
+    assert list(helpers.scan_ops_history_by_time(node.url, 40, 160, limit=25)) == expected
+
+    async def scan():
+        return [op async for op in ascan_ops_history_by_time(node.url, 40, 160, limit=25, predicate=is_vote)]
+
+    assert asyncio.run(scan()) == [(i, op) for i, op in expected if is_vote(op)]
+
+
+def test_scan_ops_history_raises_when_node_fails(node):
+    node.handler = lambda api, method, args: 1 / 0
+
+    with pytest.raises(ConnectionError):
+        list(helpers.scan_ops_history(node.url, 0, 50))
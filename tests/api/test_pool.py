@@ -0,0 +1,39 @@
+from scorum.api import call, ConnectionPool
+
+
+def test_call_reuses_connection(node):
+    pool = ConnectionPool()
+
+    for i in range(5):
+        r = call(node.url, "database_api", "lookup_accounts", ["", i], pool=pool)
+        assert r == {"api": "database_api", "method": "lookup_accounts", "args": ["", i]}
+
+    assert node.connections == 1
+    assert pool.size(node.url) == 1
+
+
+def test_pool_reconnects_after_server_drops_connection(node):
+    pool = ConnectionPool()
+    node.drop_connections = True
+    call(node.url, "database_api", "get_account_count", [], pool=pool)
+    node.drop_connections = False
+
+    assert call(node.url, "database_api", "get_account_count", [], pool=pool)["method"] == "get_account_count"
+    assert node.connections == 2
+
+
+def test_pool_evicts_idle_connections(node):
+    pool = ConnectionPool(idle_timeout=0)
+    call(node.url, "database_api", "get_account_count", [], pool=pool)
+    pool.evict_idle()
+
+    assert pool.size() == 0
+
+
+def test_pool_is_bounded_per_host(node):
+    pool = ConnectionPool(maxsize=1)
+    conns = [pool._get(("http", "127.0.0.1:%d" % node.server_address[1]))[0] for _ in range(3)]
+    for conn in conns:
+        pool._put(("http", "127.0.0.1:%d" % node.server_address[1]), conn)
+
+    assert pool.size() == 1
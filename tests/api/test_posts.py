@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+from scorum.api import helpers
+from scorum.api.async_helpers import aiter_posts
+
+POSTS = [{"author": "author%d" % (i % 7), "permlink": "post-%d" % i} for i in range(95)]
+
+
+class Discussions:
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def __call__(self, api, method, args):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise ValueError("node is down")
+
+        query = args[0]
+        start = 0
+        if "start_author" in query:
+            start = POSTS.index({"author": query["start_author"], "permlink": query["start_permlink"]})
+        return POSTS[start:start + query["limit"]]
+
+
+def test_iter_posts(node):
+    node.handler = Discussions()
+
+    assert list(helpers.iter_posts(node.url, limit=10)) == POSTS
+    assert list(helpers.iter_posts(node.url, "get_discussions_by_hot", limit=95)) == POSTS
+
+    with pytest.raises(ValueError):
+        list(helpers.iter_posts(node.url, "get_content"))
+
+
+def test_crawl_resumes_from_checkpoint(node, tmpdir):
+    path = str(tmpdir.join("posts.jsonl"))
+    node.handler = Discussions(fail_after=3)
+
+    with pytest.raises(ConnectionError):
+        helpers.crawl_posts_to_jsonl(node.url, path, limit=10)
+
+    node.handler = Discussions()
+    helpers.crawl_posts_to_jsonl(node.url, path, limit=10)
+
+    with open(path) as f:
+        assert [json.loads(line) for line in f] == POSTS
+
+
+def test_aiter_posts_resumes_from_checkpoint(node, tmpdir):
+    checkpoint = str(tmpdir.join("checkpoint"))
+    node.handler = Discussions()
+
+    async def crawl(count):
+        posts = []
+        async for post in aiter_posts(node.url, checkpoint=checkpoint, limit=10):
+            posts.append(post)
+            if len(posts) == count:
+                break
+        return posts
+
+    first = asyncio.run(crawl(19))
+    rest = asyncio.run(crawl(None))
+
+    assert first + rest[9:] == POSTS
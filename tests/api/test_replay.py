@@ -0,0 +1,135 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from scorum.api import call, call_batch, acall, AsyncClient, TrafficLog, Replay, RecordingPool, ReplayPool
+from scorum.api.codec import Codec
+from scorum.api.request import Request
+
+BLOCKS = [[n, {"block_num": n}] for n in range(200)]
+
+
+def record_sync(node, path):
+    pool = RecordingPool(path)
+    results = [call(node.url, None, "get_block", [n], pool=pool) for n in range(3)]
+    results.append(list(Request(pool).call_stream(node.url, None, "get_blocks_history", [200, 200], chunk_size=64)))
+    results.append(call_batch(node.url, [(None, "get_block", [7]), (None, "get_block", [8])], pool=pool))
+    pool.log.close()
+    return results
+
+
+def test_sync_replay_matches_recording(node, tmpdir):
+    path = str(tmpdir.join("traffic.log"))
+    node.handler = lambda api, method, args: BLOCKS if method == "get_blocks_history" else {"block_num": args[0]}
+    node.compress = True
+    recorded = record_sync(node, path)
+    node.shutdown()
+
+    pool = ReplayPool(path)
+    replayed = [call(node.url, None, "get_block", [n], pool=pool) for n in range(3)]
+    replayed.append(list(Request(pool).call_stream(node.url, None, "get_blocks_history", [200, 200], chunk_size=64)))
+    replayed.append(call_batch(node.url, [(None, "get_block", [7]), (None, "get_block", [8])], pool=pool))
+
+    assert replayed == recorded
+    assert recorded[3] == BLOCKS
+    # nothing was recorded for this one and the node is gone
+    assert call(node.url, None, "get_block", [99], retries=1, pool=pool) is None
+
+
+def test_async_record_and_replay(node, tmpdir):
+    path = str(tmpdir.join("traffic.log"))
+    log = TrafficLog(path)
+
+    async def run(**kwargs):
+        async with AsyncClient(compress=True, **kwargs) as client:
+            results = await asyncio.gather(*[client.call(node.url, "blockchain_history_api", "get_block", [n],
+                                                         parse=True) for n in range(5)])
+            streamed = [e async for e in client.call_stream(node.url, None, "get_blocks_history", [200, 200], 64)]
+            return results, streamed
+
+    node.handler = lambda api, method, args: BLOCKS if method == "get_blocks_history" else {"block_num": args[0]}
+    node.compress = True
+    recorded = asyncio.run(run(recorder=log))
+    log.close()
+    node.shutdown()
+
+    assert len(list(TrafficLog(path))) == 6
+    assert asyncio.run(run(replay=Replay(path))) == recorded
+    assert asyncio.run(acall(node.url, "blockchain_history_api", "get_block", [3], replay=Replay(path),
+                             parse=True)) == {"block_num": 3}
+
+
+def test_repeated_requests_replay_in_order_then_repeat_the_last(node, tmpdir):
+    path = str(tmpdir.join("traffic.log"))
+    heads = iter(range(100, 200))
+    node.handler = lambda api, method, args: {"head_block_number": next(heads)}
+
+    pool = RecordingPool(path)
+    for _ in range(3):
+        call(node.url, "database_api", "get_dynamic_global_properties", [], pool=pool)
+    pool.log.close()
+
+    pool = ReplayPool(path)
+    assert [call(node.url, "database_api", "get_dynamic_global_properties", [], pool=pool)["head_block_number"]
+            for _ in range(5)] == [100, 101, 102, 102, 102]
+
+
+@pytest.mark.parametrize("speed,minimum", [(None, 0.0), (1.0, 0.3), (3.0, 0.1)])
+def test_replay_timing(node, tmpdir, speed, minimum):
+    path = str(tmpdir.join("traffic.log"))
+
+    def slow(api, method, args):
+        time.sleep(0.1)
+        return args
+
+    node.handler = slow
+    pool = RecordingPool(path)
+    for n in range(3):
+        call(node.url, None, "get_block", [n], pool=pool)
+    pool.log.close()
+
+    pool = ReplayPool(path, speed=speed)
+    ts = time.time()
+    for n in range(3):
+        call(node.url, None, "get_block", [n], pool=pool)
+    elapsed = time.time() - ts
+
+    assert elapsed >= minimum
+    # the recording took at least 0.3s, replaying at once must be clearly faster even on a loaded machine
+    if speed is None:
+        assert elapsed < 0.25
+
+
+def test_replay_matches_requests_of_another_codec(node, tmpdir):
+    path = str(tmpdir.join("traffic.log"))
+    compact = Codec("compact", lambda obj: json.dumps(obj, separators=(",", ":")).encode("utf-8"), json.loads)
+    calls = [(None, "get_block", [7]), (None, "get_block", [8])]
+
+    pool = RecordingPool(path)
+    recorded = [Request(pool).call(node.url, None, "get_block", [n]) for n in range(3)]
+    recorded.append(Request(pool).call_batch(node.url, calls))
+    pool.log.close()
+
+    pool = ReplayPool(path)
+    replayed = [Request(pool, codec=compact).call(node.url, None, "get_block", [n]) for n in range(3)]
+    replayed.append(Request(pool, codec=compact).call_batch(node.url, calls))
+
+    assert replayed == recorded
+    # request ids and key order do not matter either
+    body = b'{"params":["blockchain_history_api","get_block",[1]],"method":"call","jsonrpc":"2.0","id":"42"}'
+    assert json.loads(pool.replay.next(body).data)["result"] == recorded[1]
+
+
+def test_truncated_log_ends_at_the_last_whole_record(tmpdir):
+    path = str(tmpdir.join("traffic.log"))
+    log = TrafficLog(path)
+    for n in range(3):
+        log.append("http://node/", b"request %d" % n, 200, "OK", None, b"response %d" % n, 0.01)
+    log.close()
+
+    with open(path, "rb+") as f:
+        f.truncate(f.seek(0, 2) - 3)
+
+    assert [e.data for e in TrafficLog(path)] == [b"response 0", b"response 1"]
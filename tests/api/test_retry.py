@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from scorum.api import call, acall, RetryPolicy, RetryBudget, CircuitBreaker, CircuitOpenError
+
+
+def dead_url(node_factory):
+    node = node_factory()
+    node.shutdown()
+    node.server_close()
+    return node.url
+
+
+def test_backoff_is_jittered_exponential_and_bounded():
+    policy = RetryPolicy(backoff=0.1, max_backoff=0.3)
+
+    for _ in range(100):
+        assert 0 <= policy.delay(1) <= 0.1
+        assert 0 <= policy.delay(2) <= 0.2
+        assert 0 <= policy.delay(10) <= 0.3
+
+
+def test_deadline_stops_retries(node_factory):
+    url = dead_url(node_factory)
+    policy = RetryPolicy(backoff=0.2, max_backoff=0.2, deadline=0.3)
+
+    ts = time.time()
+    assert call(url, "database_api", "get_account_count", [], retries=100, retry=policy) is None
+    assert time.time() - ts < 0.5
+
+
+def test_read_timeout(node):
+    node.handler = lambda api, method, args: time.sleep(0.5)
+    policy = RetryPolicy(read_timeout=0.1, backoff=0)
+
+    ts = time.time()
+    assert call(node.url, "database_api", "get_account_count", [], retries=2, retry=policy) is None
+    assert time.time() - ts < 0.4
+
+
+def test_budget_limits_retries():
+    budget = RetryBudget(ratio=0.5, min_tokens=1)
+    policy = RetryPolicy(budget=budget)
+
+    assert policy.delay(1) is not None
+    assert policy.delay(1) is None
+    policy.start()
+    policy.start()
+    assert policy.delay(1) is not None
+
+
+def test_circuit_breaker_fails_fast(node_factory):
+    url = dead_url(node_factory)
+    policy = RetryPolicy(backoff=0, breaker=CircuitBreaker(threshold=2, reset_timeout=60))
+
+    assert call(url, "database_api", "get_account_count", [], retries=2, retry=policy) is None
+
+    with pytest.raises(CircuitOpenError):
+        call(url, "database_api", "get_account_count", [], retry=policy)
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(acall(url, "database_api", "get_account_count", retry=policy))
+
+
+def test_circuit_breaker_half_open():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0.05)
+    breaker.record("http://a", False)
+
+    assert not breaker.allow("http://a")
+    time.sleep(0.06)
+    assert breaker.allow("http://a")
+    assert not breaker.allow("http://a")
+
+    breaker.record("http://a", True)
+    assert breaker.allow("http://a")
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scorum.api import call, AsyncClient, SingleFlight
+
+
+class SlowDgp:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, api, method, args):
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.2)
+        return {"head_block_number": 100, "args": args}
+
+
+def test_threads_share_one_request(node):
+    node.handler = SlowDgp()
+    singleflight = SingleFlight()
+
+    def get(args):
+        return call(node.url, "database_api", "get_dynamic_global_properties", args, singleflight=singleflight)
+
+    with ThreadPoolExecutor(10) as executor:
+        results = list(executor.map(get, [[]] * 10 + [[1]]))
+
+    assert results[:10] == [{"head_block_number": 100, "args": []}] * 10
+    assert results[10]["args"] == [1]
+    assert node.handler.calls == 2
+    assert singleflight.coalesced == 9
+
+
+def test_coroutines_share_one_request(node):
+    node.handler = SlowDgp()
+    singleflight = SingleFlight()
+
+    async def run():
+        async with AsyncClient(singleflight=singleflight) as client:
+            first = await asyncio.gather(*[client.call(node.url, "database_api", "get_dynamic_global_properties",
+                                                       parse=True) for _ in range(10)])
+            # the merged call is over, a new one is sent
+            second = await client.call(node.url, "database_api", "get_dynamic_global_properties", parse=True)
+            return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == [{"head_block_number": 100, "args": []}] * 10
+    assert second == first[0]
+    assert node.handler.calls == 2
+    assert singleflight.coalesced == 9
+
+
+def test_errors_reach_every_waiter():
+    singleflight = SingleFlight()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise ConnectionError("node is down")
+
+    def follow():
+        started.wait()
+        return singleflight.do("key", lambda: "not called")
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(singleflight.do, "key", fail)
+        follower = executor.submit(follow)
+
+        for future in (leader, follower):
+            with pytest.raises(ConnectionError):
+                future.result()
+
+
+def test_writes_are_not_merged():
+    assert not SingleFlight().applies("broadcast_transaction")
+    assert SingleFlight(["get_block"]).applies("get_block")
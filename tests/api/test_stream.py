@@ -0,0 +1,61 @@
+from itertools import islice
+
+from scorum.api.stream import stream_blocks, APPLY, ROLLBACK
+
+
+class Chain:
+    def __init__(self, head, lib):
+        self.head = head
+        self.lib = lib
+        self.fork = None
+        self.missing = None
+
+    def block_id(self, n):
+        return "%s-%d" % ("b" if self.fork is not None and n >= self.fork else "a", n)
+
+    def __call__(self, api, method, args):
+        if method == "get_dynamic_global_properties":
+            return {"head_block_number": self.head, "last_irreversible_block_num": self.lib}
+
+        last, limit = args
+        return [{"block_id": self.block_id(n), "previous": self.block_id(n - 1)}
+                for n in range(last - limit + 1, last + 1) if n != self.missing]
+
+
+def test_stream_irreversible_blocks(node):
+    node.handler = Chain(head=20, lib=10)
+
+    events = list(islice(stream_blocks(node.url, start=3, irreversible=True, min_interval=0.01), 8))
+
+    assert [(e.kind, e.block_num) for e in events] == [(APPLY, n) for n in range(3, 11)]
+
+
+def test_stream_follows_head_and_rolls_back_forks(node):
+    chain = Chain(head=5, lib=2)
+    node.handler = chain
+    stream = stream_blocks(node.url, start=1, min_interval=0.01)
+
+    assert [next(stream).block_num for _ in range(5)] == [1, 2, 3, 4, 5]
+
+    chain.fork = 4
+    chain.head = 6
+    events = [next(stream) for _ in range(5)]
+
+    assert [(e.kind, e.block_num) for e in events] == [(ROLLBACK, 5), (ROLLBACK, 4), (APPLY, 4), (APPLY, 5), (APPLY, 6)]
+    assert events[-1].block["block_id"] == "b-6"
+    stream.close()
+
+
+def test_stream_refetches_a_window_returned_short(node):
+    chain = Chain(head=10, lib=2)
+    chain.missing = 5
+    node.handler = chain
+    stream = stream_blocks(node.url, start=1, window=3, min_interval=0.01)
+
+    events = [next(stream) for _ in range(3)]
+    chain.missing = None
+    events += [next(stream) for _ in range(7)]
+
+    assert [e.block_num for e in events] == list(range(1, 11))
+    assert [e.block["block_id"] for e in events] == ["a-%d" % n for n in range(1, 11)]
+    stream.close()
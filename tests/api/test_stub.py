@@ -0,0 +1,83 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from scorum.api import call, call_many, helpers, RetryPolicy
+from scorum.api.blocks import fetch_blocks, iter_blocks
+from scorum.api.methods import methods
+from scorum.api.stub import Fixtures, StubNode, VIRTUAL_OPS
+
+ARGS = {
+    "lookup_account_names": [["account00001", "nobody"]],
+    "lookup_accounts": ["account00010", 5],
+    "get_witnesses": [[1, 2]],
+    "get_trending_tags": ["", 10],
+    "get_tags_used_by_author": ["account00001"],
+    "get_tags_by_category": ["", "football"],
+    "get_content": ["account00001", "post-1"],
+    "get_comments": ["account00001", "post-1", 0],
+    "get_stats_for_time": ["2018-01-01T00:00:00", 3600],
+    "get_stats_for_interval": ["2018-01-01T00:00:00", "2018-01-02T00:00:00"],
+    "get_ops_history": [100, 10, 0],
+    "get_ops_history_by_time": ["2018-01-01T00:00:00", "2018-01-01T01:00:00", 4294967295, 10],
+    "get_ops_in_block": [3, 0],
+    "get_transaction": ["%040x" % 5],
+    "get_block_header": [5],
+    "get_block_headers_history": [20, 10],
+    "get_block": [5],
+    "get_blocks_history": [20, 10],
+}
+
+
+@pytest.fixture
+def stub():
+    with StubNode(Fixtures(head_block=300, accounts=120, posts=50)) as node:
+        yield node
+
+
+def test_every_method_is_served(stub):
+    for method in methods:
+        args = ARGS.get(method, [{"limit": 10}] if method.startswith("get_discussions_by_") else [])
+        assert call(stub.url, None, method, args) is not None, method
+
+
+def test_helpers_run_against_the_stub(stub):
+    assert helpers.get_all_account_names(stub.url) == stub.fixtures.accounts
+    assert len(list(helpers.iter_posts(stub.url, limit=7))) == 50
+
+    blocks = list(iter_blocks(stub.url, 1, 301, window=50))
+    assert blocks == [stub.fixtures.block(n) for n in range(1, 301)]
+
+    virtual = list(helpers.scan_ops_history(stub.url, window=25, type=VIRTUAL_OPS))
+    assert len(virtual) == 100 and all(op["virtual_op"] for _, op in virtual)
+
+
+def test_fetch_blocks_from_the_stub(stub):
+    async def run():
+        return [b async for b in fetch_blocks(stub.url, 1, 301, window=32, concurrency=4)]
+
+    assert [b["previous"] for b in asyncio.run(run())] == ["%040x" % n for n in range(300)]
+
+
+def test_recorded_fixtures_win(stub, tmpdir):
+    path = tmpdir.join("calls.jsonl")
+    path.write(json.dumps({"method": "get_account_count", "args": [], "result": 7}) + "\n")
+    stub.fixtures.load(str(path))
+
+    assert call(stub.url, None, "get_account_count", []) == 7
+    assert call(stub.url, "database_api", "no_such_method", [], retries=1) is None
+
+
+def test_latency_and_error_injection():
+    with StubNode(latency=0.05, jitter=0.05, error_rate=0.5, seed=1) as node:
+        ts = time.time()
+        results = call_many(node.url, [(None, "get_account_count", [])] * 8, workers=8, retries=20,
+                            retry=RetryPolicy(backoff=0.01))
+        elapsed = time.time() - ts
+
+    assert elapsed >= 0.05
+    # every call got through some retry, and some requests were answered with injected errors
+    assert [r for r, _ in results] == [500] * 8
+    assert node.requests > 8
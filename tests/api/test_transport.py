@@ -0,0 +1,99 @@
+import asyncio
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scorum.api import call, call_batch, call_many, AsyncClient, get_transport, register_transport, ConnectionPool
+from scorum.api.pool import default_pool
+from scorum.api.stub import Fixtures, UnixStubNode, WebSocketStubNode
+from scorum.api.transport import TRANSPORTS, UnixConnectionPool, WebSocketTransport
+
+
+@pytest.fixture
+def unix_node():
+    # AF_UNIX paths are limited to ~100 bytes, pytest's tmpdir can be longer
+    path = os.path.join(tempfile.mkdtemp(), "node.sock")
+    with UnixStubNode(path, Fixtures(head_block=100)) as node:
+        yield node
+
+
+@pytest.fixture
+def ws_node():
+    with WebSocketStubNode(Fixtures(head_block=100), latency=0.01, jitter=0.05) as node:
+        yield node
+
+
+def test_transport_is_chosen_by_scheme():
+    assert get_transport("http://node/") is default_pool
+    assert isinstance(get_transport("unix:///run/node.sock"), UnixConnectionPool)
+    assert isinstance(get_transport("ws://node:8091/"), WebSocketTransport)
+    assert get_transport("ws://node:8091/") is get_transport("ws://node:8091/")
+
+    with pytest.raises(ValueError):
+        get_transport("gopher://node/")
+
+
+def test_registered_transport_is_used(node):
+    pool = ConnectionPool()
+    register_transport("custom", lambda url: pool)
+    try:
+        assert get_transport("custom://anything") is pool
+    finally:
+        del TRANSPORTS["custom"]
+
+
+def test_sync_calls_over_unix_socket(unix_node):
+    url = unix_node.url
+
+    assert call(url, None, "get_block", [5]) == unix_node.fixtures.block(5)
+    assert call_batch(url, [(None, "get_block", [n]) for n in range(1, 4)]) == \
+        [unix_node.fixtures.block(n) for n in range(1, 4)]
+    assert [r for r, _ in call_many(url, [(None, "get_block", [n]) for n in range(1, 30)], workers=4)] == \
+        [unix_node.fixtures.block(n) for n in range(1, 30)]
+    # keep-alive connections are pooled per socket path
+    assert get_transport(url).size(url) > 0
+
+
+def test_async_calls_over_unix_socket(unix_node):
+    async def run():
+        async with AsyncClient() as client:
+            return await asyncio.gather(*[client.call(unix_node.url, None, "get_block", [n], parse=True)
+                                          for n in range(1, 20)])
+
+    assert asyncio.run(run()) == [unix_node.fixtures.block(n) for n in range(1, 20)]
+
+
+def test_sync_calls_share_one_websocket(ws_node):
+    def get(n):
+        return call(ws_node.url, None, "get_block", [n])
+
+    with ThreadPoolExecutor(10) as executor:
+        blocks = list(executor.map(get, range(1, 51)))
+
+    assert blocks == [ws_node.fixtures.block(n) for n in range(1, 51)]
+    assert call_batch(ws_node.url, [(None, "get_block", [n]) for n in range(1, 6)]) == \
+        [ws_node.fixtures.block(n) for n in range(1, 6)]
+    assert ws_node.connections == 1
+
+    get_transport(ws_node.url).close()
+
+
+def test_async_calls_are_multiplexed_over_one_websocket(ws_node):
+    async def run():
+        async with AsyncClient() as client:
+            results = await asyncio.gather(*[client.call(ws_node.url, None, "get_block", [n], parse=True)
+                                             for n in range(1, 101)])
+            batch = await client.call_batch(ws_node.url, [(None, "get_block", [n]) for n in range(1, 4)])
+            streamed = [b async for b in client.call_stream(ws_node.url, None, "get_blocks_history", [11, 10], 64)]
+            return results, batch, streamed
+
+    results, batch, streamed = asyncio.run(run())
+
+    # responses come back out of order and are matched by id
+    assert results == [ws_node.fixtures.block(n) for n in range(1, 101)]
+    assert batch == [ws_node.fixtures.block(n) for n in range(1, 4)]
+    assert streamed == [[n, ws_node.fixtures.block(n)] for n in range(1, 11)]
+    assert ws_node.connections == 1
+    assert ws_node.messages == 102